@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 from models import db
 from config import Config
@@ -9,13 +10,34 @@ from routes.grades_route import grades_bp
 from flask_mail import Mail
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from utils.jwt_blacklist import blacklisted_tokens
+from utils.jwt_blacklist import init_revocation_store
+from utils.mail_queue import mail_worker
+from utils.search import install_search_ddl
+from utils.catalogue import catalogue_cache
+from utils.simulator import simulator_index
+from utils.messaging import message_hub
+from utils.unread_counters import repair_unread_counters
+from utils.query_profiler import init_query_profiler
+from utils.auth import init_auth
+from utils.counters import recompute_counters
+from utils.experience_averages import backfill_experience_averages
+from utils.json_provider import init_json_provider
+from utils.catalogue_import import CatalogueImport, install_catalogue_ddl, missing_catalogue_index
+from utils.acceptance_stats import rebuild_rollups
+from utils.schema import upgrade_schema
 from routes.universitites_route import universities_bp
 from routes.specialities_route import specialities_bp
+from routes.simulator_route import simulator_bp
+from routes.message_route import messages_bp
+from routes.stats_route import stats_bp
 app = Flask(__name__)
 app.config.from_object(Config)
+init_json_provider(app)
+catalogue_cache.check_interval = app.config["CATALOGUE_CHECK_INTERVAL"]
+simulator_index.check_interval = app.config["SIMULATOR_INDEX_CHECK_INTERVAL"]
 CORS(app, origins=["http://localhost:3000"])
 db.init_app(app)
+init_query_profiler(app)
 app.register_blueprint(users_bp, url_prefix='/users')
 app.register_blueprint(auth_bp, url_prefix='/auth')
 app.register_blueprint(experience_bp, url_prefix='/experience')
@@ -23,16 +45,131 @@ app.register_blueprint(admin_bp, url_prefix='/admin')
 app.register_blueprint(grades_bp, url_prefix='/grades')
 app.register_blueprint(universities_bp, url_prefix='/universities')
 app.register_blueprint(specialities_bp, url_prefix='/specialities')
+app.register_blueprint(simulator_bp, url_prefix='/simulator')
+app.register_blueprint(messages_bp, url_prefix='/messages')
+app.register_blueprint(stats_bp, url_prefix='/stats')
 mail = Mail(app)
+if app.config.get("MAIL_QUEUE_INPROCESS"):
+    mail_worker.init_app(app, mail)
 jwt = JWTManager(app)
+init_auth(app, jwt)
+message_hub.init_app(app)
+revocation_store = init_revocation_store(app)
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
-    return jwt_payload["jti"] in blacklisted_tokens
+    return revocation_store.is_revoked(jwt_payload)
+
+
+@app.cli.command("purge-revoked-tokens")
+def purge_revoked_tokens():
+    """Supprime les révocations de jetons expirés (à planifier, ex. cron horaire)."""
+    deleted = revocation_store.purge_expired()
+    print(f"✅ {deleted} révocation(s) expirée(s) supprimée(s).")
+
+
+@app.cli.command("mail-worker")
+def run_mail_worker():
+    """Vide l'outbox d'emails en continu (à lancer si MAIL_QUEUE_INPROCESS=false)."""
+    mail_worker.start(app, mail)
+    print("📬 Worker d'emails démarré (Ctrl+C pour arrêter).")
+    try:
+        mail_worker.wait()
+    except KeyboardInterrupt:
+        mail_worker.stop()
+
+def report_schema_upgrade():
+    added, created = upgrade_schema()
+    for table, column in added:
+        print(f"➕ Colonne {table}.{column} ajoutée.")
+    for name in created:
+        print(f"➕ Index {name} créé.")
+    if ("users", "unread_messages") in added:
+        # Colonne créée à 0 : les totaux sont recalculés depuis les messages non lus
+        repair_unread_counters()
+    return added, created
+
+@app.cli.command("upgrade-schema")
+def upgrade_db_schema():
+    """Ajoute aux bases existantes les colonnes et index des modèles (create_all ne modifie pas les tables)."""
+    report_schema_upgrade()
+    print("✅ Schéma à jour.")
+
+@app.cli.command("init-search")
+def init_search():
+    """Installe pg_trgm/unaccent et les index de recherche floue."""
+    install_search_ddl()
+    print("✅ Index de recherche installés.")
+
+@app.cli.command("repair-unread-counters")
+def repair_unread():
+    """Recalcule les compteurs de messages non lus (à planifier périodiquement, ex. cron)."""
+    conversations = repair_unread_counters()
+    print(f"✅ Compteurs recalculés ({conversations} conversation(s) avec non-lus).")
+
+@app.cli.command("recompute-counters")
+def recompute_university_counters():
+    """Recalcule les compteurs dénormalisés des universités et spécialités."""
+    recompute_counters()
+    catalogue_cache.invalidate()
+    print("✅ Compteurs universités/spécialités recalculés.")
+
+@app.cli.command("backfill-experience-averages")
+def backfill_averages():
+    """Copie average_each_year (JSONB) des expériences existantes dans experience_averages."""
+    inserted = backfill_experience_averages()
+    print(f"✅ {inserted} moyenne(s) annuelle(s) migrée(s).")
+
+@app.cli.command("rebuild-acceptance-stats")
+def rebuild_acceptance_stats():
+    """Reconstruit les agrégats de /stats depuis les expériences approuvées."""
+    rebuild_rollups()
+    print("✅ Statistiques d'acceptation reconstruites.")
+
+def report_catalogue_migration():
+    blocked = install_catalogue_ddl()
+    for kind, duplicates in blocked.items():
+        print(f"⚠️ {kind} : index unique non créé, {len(duplicates)} clé(s) en double (import désactivé) :")
+        for duplicate in duplicates:
+            print("  " + ", ".join(f"{key}={value!r}" for key, value in duplicate.items()))
+    return blocked
+
+@app.cli.command("migrate-catalogue")
+def migrate_catalogue():
+    """Crée les index uniques du catalogue ; signale les doublons qui l'empêchent."""
+    blocked = report_catalogue_migration()
+    if blocked:
+        raise click.ClickException("Doublons à fusionner ou supprimer avant de relancer la migration.")
+    print("✅ Index uniques du catalogue installés.")
+
+@app.cli.command("import-catalogue")
+@click.argument("kind", type=click.Choice(["universities", "specialities"]))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=1000, show_default=True)
+def import_catalogue(kind, path, batch_size):
+    """Importe universités ou spécialités depuis un fichier CSV ou NDJSON (ré-exécutable)."""
+    missing = missing_catalogue_index(kind)
+    if missing:
+        raise click.ClickException(f"Index {missing} absent : lancer d'abord 'flask migrate-catalogue'.")
+    content_type = "text/csv" if path.lower().endswith(".csv") else "application/x-ndjson"
+
+    def progress(report):
+        print(f"… {report['lines']} ligne(s) lues, {report['inserted']} créée(s), {report['rejected']} rejetée(s)")
+
+    with open(path, "rb") as stream:
+        report = CatalogueImport(kind, batch_size, progress).run(stream, content_type)
+    for error in report["errors"]:
+        print(f"  ligne {error['line']} : {error['error']}")
+    print(f"✅ {report['inserted']} créée(s), {report['existing']} déjà présente(s), "
+          f"{report['duplicates']} doublon(s), {report['rejected']} rejetée(s), {report['links']} lien(s) univspec.")
 
 if __name__ == '__main__':
     with app.app_context():
         print('URL de connexion utilisée :', app.config['SQLALCHEMY_DATABASE_URI'])
         db.create_all()
+        report_schema_upgrade()
+        install_search_ddl()
+        # Doublons signalés sans bloquer le démarrage : seul l'import du catalogue en dépend
+        report_catalogue_migration()
         print("✅ Tables créées avec succès.")
         app.run(debug=True)
@@ -0,0 +1,71 @@
+"""Micro-benchmark du rendu des emails : f-string + serializer par appel vs template compilé en lot.
+
+Usage :
+    python -m benchmarks.email_render_bench --messages 10000
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+from flask import Flask
+from itsdangerous import URLSafeTimedSerializer
+from utils.email import render_emails, VERIFICATION_EMAIL
+
+
+def legacy_render(user, secret_key):
+    # Reproduction de l'ancienne implémentation (serializer et HTML reconstruits à chaque appel)
+    token = URLSafeTimedSerializer(secret_key).dumps(user.email, salt='reset-password')
+    confirm_url = f"http://127.0.0.1:5000/auth/verify/{token}"
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
+        <div style="max-width: 600px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0px 2px 8px rgba(0, 0, 0, 0.1);">
+            <h2 style="color: #2c3e50;">Bonjour {user.first_name},</h2>
+            <p style="font-size: 16px; color: #333;">
+                Merci de vous être inscrit sur <strong>PathwayFR</strong> 🎉
+            </p>
+            <p style="font-size: 16px; color: #333;">
+                Veuillez cliquer sur le bouton ci-dessous pour vérifier votre adresse email :
+            </p>
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="{confirm_url}" style="background-color: #3498db; color: #fff; padding: 14px 28px; text-decoration: none; font-weight: bold; border-radius: 5px;">
+                    Vérifier mon adresse
+                </a>
+            </div>
+            <p style="font-size: 14px; color: #999;">
+                Ou copiez-collez ce lien dans votre navigateur si le bouton ne fonctionne pas :<br>
+                <a href="{confirm_url}" style="color: #3498db;">{confirm_url}</a>
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10_000)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = Flask(__name__, template_folder=os.path.join(root, "templates"))
+    app.config["SECRET_KEY"] = "bench-secret"
+    users = [SimpleNamespace(email=f"user{i}@bench.local", first_name=f"User{i}") for i in range(args.messages)]
+
+    with app.app_context():
+        start = time.perf_counter()
+        for user in users:
+            legacy_render(user, app.config["SECRET_KEY"])
+        legacy = time.perf_counter() - start
+
+        render_emails(VERIFICATION_EMAIL, users[:1])  # compilation du template (une seule fois)
+        start = time.perf_counter()
+        render_emails(VERIFICATION_EMAIL, users)
+        bulk = time.perf_counter() - start
+
+    for name, total in (("f-string par appel", legacy), ("template compilé (lot)", bulk)):
+        print(f"{name:<24} {total * 1e6 / args.messages:8.1f} µs/message  ({total:.2f} s au total)")
+
+
+if __name__ == "__main__":
+    main()
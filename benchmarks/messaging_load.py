@@ -0,0 +1,112 @@
+"""Test de charge de la messagerie : connexions SSE simultanées et latence de bout en bout.
+
+Ouvre `--connections` flux /messages/stream (un par utilisateur destinataire), envoie
+`--messages` messages via POST /messages/ et mesure le délai envoi -> réception SSE.
+Les utilisateurs et le service doivent exister ; les jetons sont signés avec la
+configuration de app.py (même SECRET_KEY que le serveur testé).
+
+Usage :
+    python -m benchmarks.messaging_load --base-url http://127.0.0.1:5000 \
+        --sender-id 1 --receiver-ids 2-501 --service-id 1 --messages 2000
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+def parse_ids(spec):
+    start, _, end = spec.partition("-")
+    return list(range(int(start), int(end or start) + 1))
+
+
+def make_tokens(user_ids):
+    from flask_jwt_extended import create_access_token
+    from app import app
+    with app.app_context():
+        return {user_id: create_access_token(identity=str(user_id)) for user_id in user_ids}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Listener(threading.Thread):
+    def __init__(self, url, token, latencies, ready):
+        super().__init__(daemon=True)
+        self.url, self.token, self.latencies, self.ready = url, token, latencies, ready
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.url.hostname, self.url.port, timeout=None)
+        conn.request("GET", "/messages/stream", headers={"Authorization": f"Bearer {self.token}"})
+        response = conn.getresponse()
+        self.ready.release()
+        event = None
+        while True:
+            line = response.readline()
+            if not line:
+                return
+            line = line.decode().rstrip("\n")
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:") and event == "message":
+                data = json.loads(line.split(":", 1)[1])
+                sent_at = json.loads(data["message"])["sent_at"]
+                self.latencies.append((time.time() - sent_at) * 1000)
+
+
+def send(url, token, receiver_id, service_id):
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    body = json.dumps({"receiver_id": receiver_id, "service_id": service_id, "message": json.dumps({"sent_at": time.time()})})
+    conn.request("POST", "/messages/", body=body, headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--sender-id", type=int, required=True)
+    parser.add_argument("--receiver-ids", required=True, help="intervalle, ex. 2-501")
+    parser.add_argument("--service-id", type=int, required=True)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--senders", type=int, default=16, help="requêtes d'envoi simultanées")
+    args = parser.parse_args()
+
+    url = urlparse(args.base_url)
+    receivers = parse_ids(args.receiver_ids)
+    tokens = make_tokens(receivers + [args.sender_id])
+
+    latencies = []
+    ready = threading.Semaphore(0)
+    for receiver_id in receivers:
+        Listener(url, tokens[receiver_id], latencies, ready).start()
+    for _ in receivers:
+        ready.acquire()
+    print(f"🔌 {len(receivers)} connexions SSE ouvertes")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.senders) as pool:
+        statuses = list(pool.map(
+            lambda _: send(url, tokens[args.sender_id], random.choice(receivers), args.service_id),
+            range(args.messages),
+        ))
+    elapsed = time.perf_counter() - start
+    time.sleep(2)  # laisse arriver les derniers événements
+
+    errors = sum(1 for status in statuses if status != 201)
+    print(f"📨 {args.messages} messages envoyés en {elapsed:.1f} s ({args.messages / elapsed:.0f} msg/s), erreurs={errors}")
+    if latencies:
+        print(f"⏱  livrés={len(latencies)}  p50={statistics.median(latencies):.1f} ms  "
+              f"p95={percentile(latencies, 95):.1f} ms  p99={percentile(latencies, 99):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from urllib.parse import quote
+from utils.db_pool import engine_options_from_env
 
 
 # Charge les variables depuis .env
@@ -16,16 +17,37 @@ dbname = os.getenv("DB_NAME")
 class Config:
     SQLALCHEMY_DATABASE_URI=f"postgresql://{username}:{password}@{host}:{port}/{dbname}"
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv("SQLALCHEMY_TRACK_MODIFICATIONS")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env()
     MAIL_SERVER = os.getenv("MAIL_SERVER")
     MAIL_PORT = os.getenv("MAIL_PORT")
     MAIL_USE_TLS = os.getenv("MAIL_USE_TLS")
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+    MAIL_QUEUE_INPROCESS = os.getenv("MAIL_QUEUE_INPROCESS", "false").lower() == "true"  # par défaut : flask mail-worker
+    MAIL_QUEUE_WORKERS = int(os.getenv("MAIL_QUEUE_WORKERS", "2"))
+    MAIL_QUEUE_BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", "50"))
+    MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", "5"))
+    MAIL_QUEUE_RETRY_DELAY = int(os.getenv("MAIL_QUEUE_RETRY_DELAY", "30"))
+    MAIL_QUEUE_POLL_INTERVAL = int(os.getenv("MAIL_QUEUE_POLL_INTERVAL", "5"))
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_ACCES_TOKEN_EXPIRES = os.getenv("JWT_ACCESS_TOKEN_EXPIRES")
     JWT_REFRESH_TOKEN_EXPIRES = os.getenv("JWT_REFRESH_TOKEN_EXPIRES")
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    JWT_REVOCATION_BACKEND = os.getenv("JWT_REVOCATION_BACKEND", "memory")  # "memory" ou "database"
+    JWT_REVOCATION_MISS_TTL = int(os.getenv("JWT_REVOCATION_MISS_TTL", "5"))  # secondes de cache d'un jti non révoqué
+    JWT_REVOCATION_CACHE_SIZE = int(os.getenv("JWT_REVOCATION_CACHE_SIZE", "10000"))
     FRONTEND_URL = os.getenv("FRONTEND_URL")
     NEXT_PUBLIC_API_URL = os.getenv("NEXT_PUBLIC_API_URL")
+    ADMIN_STATS_CACHE_TTL = int(os.getenv("ADMIN_STATS_CACHE_TTL", "30"))
+    CATALOGUE_CHECK_INTERVAL = int(os.getenv("CATALOGUE_CHECK_INTERVAL", "5"))  # secondes entre deux contrôles de fraîcheur
+    SIMULATOR_INDEX_CHECK_INTERVAL = int(os.getenv("SIMULATOR_INDEX_CHECK_INTERVAL", "30"))  # secondes entre deux contrôles de fraîcheur
+    MESSAGING_BACKEND = os.getenv("MESSAGING_BACKEND", "memory")  # "memory" (un worker) ou "postgres" (LISTEN/NOTIFY)
+    MESSAGING_QUEUE_SIZE = int(os.getenv("MESSAGING_QUEUE_SIZE", "100"))
+    MESSAGING_HEARTBEAT = int(os.getenv("MESSAGING_HEARTBEAT", "15"))
+    SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() == "true"  # en-têtes X-DB-Queries / Server-Timing
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))
+    MODERATION_CLAIM_TTL = int(os.getenv("MODERATION_CLAIM_TTL", "900"))  # secondes avant qu'une réservation expire
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")  # "orjson" (si installé) ou "default"
@@ -14,3 +14,9 @@ from .experiences_model import Experience
 from .univspec_model import UnivSpec
 from .service_model import Service
 from .message_model import Message
+from .revoked_token_model import RevokedToken
+from .outbox_email_model import OutboxEmail
+from .unread_counter_model import UnreadCounter
+from .experience_average_model import ExperienceAverage
+from .moderation_claim_model import ModerationClaim
+from .acceptance_rollup_model import AcceptanceRollup, AcceptanceRollupValue
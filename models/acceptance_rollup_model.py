@@ -0,0 +1,39 @@
+from models import db
+
+
+class AcceptanceRollup(db.Model):
+    """Agrégats par spécialité × université × année × type de bac (maintenus par utils/acceptance_stats)."""
+    __tablename__ = 'acceptance_rollups'
+
+    speciality_id = db.Column(db.Integer, primary_key=True)
+    university_id = db.Column(db.Integer, primary_key=True)
+    application_year = db.Column(db.Integer, primary_key=True)
+    bac_type = db.Column(db.String, primary_key=True)  # '' si non renseigné
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    # Sommes et effectifs des candidats acceptés : moyenne = somme / effectif
+    bac_sum = db.Column(db.Float, nullable=False, default=0)
+    bac_count = db.Column(db.Integer, nullable=False, default=0)
+    tcf_sum = db.Column(db.Float, nullable=False, default=0)
+    tcf_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_acceptance_rollups_university", "university_id", "speciality_id"),
+    )
+
+
+class AcceptanceRollupValue(db.Model):
+    """Distribution des valeurs (bac, tcf) des acceptés par groupe : médianes exactes sans lire experiences."""
+    __tablename__ = 'acceptance_rollup_values'
+
+    speciality_id = db.Column(db.Integer, primary_key=True)
+    university_id = db.Column(db.Integer, primary_key=True)
+    application_year = db.Column(db.Integer, primary_key=True)
+    bac_type = db.Column(db.String, primary_key=True)
+    metric = db.Column(db.String, primary_key=True)  # 'bac' ou 'tcf'
+    value = db.Column(db.Float, primary_key=True)
+    n = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_acceptance_rollup_values_university", "university_id", "speciality_id"),
+    )
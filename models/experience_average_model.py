@@ -0,0 +1,26 @@
+from models import db
+
+
+class ExperienceAverage(db.Model):
+    __tablename__ = 'experience_averages'
+
+    experience_id = db.Column(
+        db.Integer,
+        db.ForeignKey('experiences.id_experience', ondelete='CASCADE', onupdate='CASCADE'),
+        primary_key=True
+    )
+    level = db.Column(db.String, primary_key=True)
+    is_repeat = db.Column(db.Boolean, primary_key=True, default=False)
+    average = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        # Requêtes par plage sur une année (ex. moyenne de L3 entre 12 et 14)
+        db.Index("ix_experience_averages_level_average", "level", "is_repeat", "average"),
+    )
+
+    def to_dict(self):
+        return {
+            "level": self.level,
+            "is_repeat": self.is_repeat,
+            "average": self.average
+        }
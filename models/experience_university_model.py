@@ -5,3 +5,6 @@ experience_university = db.Table(
     db.Column("experience_id", db.Integer, db.ForeignKey("experiences.id_experience"), primary_key=True),
     db.Column("university_id", db.Integer, db.ForeignKey("universities.id_university"), primary_key=True)
 )
+
+# La clé primaire commence par experience_id : index dédié pour filtrer par université
+db.Index("ix_experience_university_university_id", experience_university.c.university_id, experience_university.c.experience_id)
@@ -1,7 +1,7 @@
 from models import db
-from sqlalchemy import CheckConstraint, ARRAY
+from sqlalchemy import CheckConstraint, text
 from models.experience_university_model import experience_university
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 
 
 
@@ -32,6 +32,8 @@ class Experience(db.Model):
     university_accepted_in = db.Column(ARRAY(db.Integer), nullable=True)  # Universités acceptées
     university_rejected_in = db.Column(ARRAY(db.Integer), nullable=True)
 
+    # Forme typée et indexée de average_each_year (remplie à la création et par flask backfill-experience-averages)
+    averages = db.relationship('ExperienceAverage', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
     user = db.relationship('User', backref='experiences')
     speciality = db.relationship('Speciality', backref='experiences', lazy=True)
     universities = db.relationship(
@@ -52,6 +54,15 @@ class Experience(db.Model):
     __table_args__ = (
         CheckConstraint("bac_average BETWEEN 0 AND 20", name="check_bac_average_range"),
         CheckConstraint("level_tcf BETWEEN 0 AND 699", name="check_tcf_level_range"),
+        # Index composites pour la pagination par curseur de l'explorer
+        db.Index("ix_experiences_status_year_id", "is_validated", "candidature_year", "id_experience"),
+        db.Index("ix_experiences_status_speciality_year_id", "is_validated", "speciality_id", "candidature_year", "id_experience"),
+        db.Index("ix_experiences_status_application_year", "is_validated", "application_year"),
+        # File de modération : expériences en attente, dans l'ordre de création (id croissant)
+        db.Index("ix_experiences_pending_id", "id_experience", postgresql_where=text("is_validated = 'pending'")),
+        # Requêtes de confinement (@>) : « expériences acceptées/refusées à l'université X »
+        db.Index("ix_experiences_accepted_in_gin", "university_accepted_in", postgresql_using="gin"),
+        db.Index("ix_experiences_rejected_in_gin", "university_rejected_in", postgresql_using="gin"),
     )
     def to_dict(self):
         return {
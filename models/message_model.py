@@ -29,4 +29,21 @@ class Message(db.Model):
 
     __table_args__ = (
         CheckConstraint("sender_id != receiver_id", name="check_sender_not_receiver"),
+        # Historique d'une conversation : un parcours d'index ordonné par sens (created_at, id_message)
+        db.Index("ix_messagerie_sender_receiver_created", "sender_id", "receiver_id", "created_at", "id_message"),
+        # Messages non lus uniquement : réconciliation des compteurs
+        db.Index("ix_messagerie_unread", "receiver_id", "sender_id", postgresql_where=db.text("is_read = false")),
     )
+
+    def to_dict(self):
+        return {
+            "id_message": self.id_message,
+            "sender_id": self.sender_id,
+            "receiver_id": self.receiver_id,
+            "service_id": self.service_id,
+            "message": self.message,
+            "media": self.media,
+            "media_type": self.media_type,
+            "is_read": self.is_read,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
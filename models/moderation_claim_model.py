@@ -0,0 +1,19 @@
+from models import db
+from sqlalchemy.sql import func
+
+
+class ModerationClaim(db.Model):
+    __tablename__ = 'moderation_claims'
+
+    experience_id = db.Column(
+        db.Integer,
+        db.ForeignKey('experiences.id_experience', ondelete='CASCADE', onupdate='CASCADE'),
+        primary_key=True
+    )
+    moderator_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id_user', ondelete='CASCADE', onupdate='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    claimed_at = db.Column(db.TIMESTAMP, server_default=func.now(), nullable=False)
@@ -0,0 +1,30 @@
+from models import db
+from sqlalchemy.sql import func
+
+
+class OutboxEmail(db.Model):
+    __tablename__ = 'outbox_emails'
+
+    id_email = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    recipient = db.Column(db.String, nullable=False)
+    subject = db.Column(db.String, nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    sender = db.Column(db.String, nullable=True)
+    status = db.Column(
+        db.Enum("pending", "sent", "failed", name="outbox_email_status"),
+        default="pending",
+        nullable=False
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.TIMESTAMP, server_default=func.now(), nullable=False)
+    created_at = db.Column(db.TIMESTAMP, server_default=func.now())
+    sent_at = db.Column(db.TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # File d'attente : seules les lignes en attente sont indexées
+        db.Index(
+            "ix_outbox_emails_pending", "next_attempt_at", "id_email",
+            postgresql_where=db.text("status = 'pending'")
+        ),
+    )
@@ -0,0 +1,10 @@
+from models import db
+from sqlalchemy.sql import func
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.TIMESTAMP, nullable=True, index=True)
+    revoked_at = db.Column(db.TIMESTAMP, server_default=func.now(), nullable=False, index=True)
@@ -27,6 +27,8 @@ class Speciality(db.Model):
         CheckConstraint("nbr_candidate_accepted_in >= 0"),
         CheckConstraint("min_tcf_score BETWEEN 300 AND 699"),
         CheckConstraint("min_average BETWEEN 10 AND 20"),
+        # Clé naturelle de l'import du catalogue (utils/catalogue_import.py)
+        db.Index("uq_specialities_name_university", "speciality_name", "university_id", unique=True),
     )
     def to_dict(self):
         return {
@@ -29,6 +29,8 @@ class University(db.Model):
     __table_args__ = (
         db.CheckConstraint("specialities_nbr >= 0"),
         db.CheckConstraint("nbr_candidates_accepted >= 0"),
+        # Clé naturelle de l'import du catalogue (utils/catalogue_import.py)
+        db.Index("uq_universities_name_city", "univ_name", "city", unique=True),
     )
     
     def to_dict(self):
@@ -0,0 +1,21 @@
+from models import db
+
+
+class UnreadCounter(db.Model):
+    __tablename__ = 'unread_counters'
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id_user', ondelete='CASCADE', onupdate='CASCADE'),
+        primary_key=True
+    )
+    peer_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id_user', ondelete='CASCADE', onupdate='CASCADE'),
+        primary_key=True
+    )
+    unread = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.CheckConstraint("unread >= 0"),
+    )
@@ -29,6 +29,7 @@ class User(db.Model):
     annee_etude_actuelle = db.Column(db.String)
     subscription = db.Column(db.Boolean, default=False)
     isbanned = db.Column(db.Boolean, default=False)
+    unread_messages = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # maintenu par utils/unread_counters
 
     __table_args__ = (
         db.CheckConstraint("role IN ('user', 'admin')"),
@@ -1,10 +1,24 @@
-from flask import Blueprint,request,jsonify
-from flask_jwt_extended import jwt_required,get_jwt_identity
+from flask import Blueprint,request,jsonify,current_app
+from flask_jwt_extended import jwt_required, get_current_user
+from utils.auth import admin_required, invalidate_principal
 from models.experiences_model import Experience
 from models.user_model import User
 from app import db
 from models.university_model import University
 from sqlalchemy import func
+from utils.simulator import simulator_index
+from utils.admin_stats import get_stats, invalidate_stats
+from utils.catalogue import catalogue_cache
+from utils.export import EXPORT_FORMATS, stream_query, keyset_query_page, wants_page, row_to_dict
+from utils.pagination import parse_limit
+from utils.experience_resolver import filter_experiences
+from utils.db_pool import pool_metrics
+from utils.counters import on_status_change, on_status_change_many
+from utils.catalogue_import import CatalogueImport, missing_catalogue_index
+from utils.moderation import (
+    parse_ids, select_experience_ids, moderate_experiences, set_users_banned, outcome_response,
+    queue_query, claim_experiences, release_claims, unclaimed,
+)
 
 
 
@@ -17,45 +31,102 @@ admin_bp = Blueprint ("admin",__name__,url_prefix="/admin")
 # Récupérer les expériences en attente de validation à tester 
 
 @admin_bp.route("/pending", methods=["GET"])
-@jwt_required()
+@admin_required
 def get_pending_experiences():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user or not user.is_admin:
-        return jsonify({"error": "Accès non autorisé"}), 403
-
-    experiences = Experience.query.filter_by(is_validated="pending").all()
+    # Tableau complet par défaut ; ?limit=&cursor= pour paginer (voir aussi /admin/queue)
+    query = queue_query()
+    try:
+        if wants_page(request.args):
+            page = keyset_query_page(query, Experience.id_experience, request.args)
+            rows = page["items"]
+        else:
+            page = None
+            rows = [row._asdict() for row in query.order_by(Experience.id_experience)]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     results = [
         {
-            "id_experience": e.id_experience,
-            "user_id": e.user_id,
-            "candidature_year": e.candidature_year,
-            "specialite": e.speciality.specialities_name if e.speciality else None,
-            "universite": e.university.name if e.university else None,
+            "id_experience": row["id_experience"],
+            "user_id": row["user_id"],
+            "candidature_year": row["candidature_year"],
+            "specialite": row["speciality_name"],
+            "universite": ", ".join(row["universities"] or []) or None,
         }
-        for e in experiences
+        for row in rows
     ]
-
+    if page is not None:
+        return jsonify(dict(page, items=results)), 200
     return jsonify(results), 200
 
 
+# file de modération paginée : ?limit=&cursor=&speciality_id=&university_id=&application_year=...&unclaimed=true
+@admin_bp.route("/queue", methods=["GET"])
+@admin_required
+def get_moderation_queue():
+    try:
+        query = filter_experiences(queue_query(), request.args)
+        if request.args.get("unclaimed") == "true":
+            query = query.filter(unclaimed(current_app.config["MODERATION_CLAIM_TTL"]))
+        return jsonify(keyset_query_page(query, Experience.id_experience, request.args)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+# réserver un lot d'expériences : {"limit": 20} ; les autres modérateurs ne le recevront pas
+@admin_bp.route("/queue/claim", methods=["POST"])
+@admin_required
+def claim_moderation_batch():
+    data = request.get_json(silent=True) or {}
+    try:
+        limit = parse_limit(data.get("limit"), default=20)
+    except (ValueError, TypeError):
+        return jsonify({"error": "'limit' doit être un entier positif"}), 400
+    try:
+        ids = claim_experiences(get_current_user().id_user, limit, current_app.config["MODERATION_CLAIM_TTL"])
+        rows = queue_query().filter(Experience.id_experience.in_(ids)).order_by(Experience.id_experience).all() if ids else []
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"items": [row_to_dict(row) for row in rows]}), 200
+
+
+# libérer ses réservations : {"ids": [...]} ou corps vide pour tout libérer
+@admin_bp.route("/queue/claim", methods=["DELETE"])
+@admin_required
+def release_moderation_batch():
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = parse_ids(data["ids"]) if "ids" in data else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        released = release_claims(ids, moderator_id=get_current_user().id_user)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"released": released}), 200
+
+
 @admin_bp.route("/<int:id_experience>", methods=["DELETE"])
 @jwt_required()
 def delete_experience(id_experience):
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({"success": False, "error": "Utilisateur connecté introuvable"}), 404
 
     experience = Experience.query.get_or_404(id_experience)
 
-    if current_user.role == "admin" or experience.user_id == current_user_id:
+    if current_user.role == "admin" or experience.user_id == current_user.id_user:
         try:
+            on_status_change(experience, experience.is_validated, None)
             db.session.delete(experience)
             db.session.commit()
+            simulator_index.discard(id_experience)
+            invalidate_stats()
+            catalogue_cache.invalidate()
             return jsonify({"success": True, "message": "Expérience supprimée"}), 200
         except Exception as e:
             db.session.rollback()
@@ -68,14 +139,13 @@ def delete_experience(id_experience):
 @admin_bp.route("/delete/<int:user_id>", methods=["DELETE"])
 @jwt_required()
 def delete_user(user_id):
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_user()
 
     if not current_user:
         return jsonify({"success": False, "error": "Utilisateur connecté introuvable"}), 404
 
     # Empêcher qu’un utilisateur se supprime lui-même
-    if current_user_id == user_id:
+    if current_user.id_user == user_id:
         return jsonify({"success": False, "error": "Vous ne pouvez pas supprimer votre propre compte"}), 400
 
     target_user = User.query.get_or_404(user_id)
@@ -86,8 +156,24 @@ def delete_user(user_id):
             return jsonify({"success": False, "error": "Vous ne pouvez pas supprimer un autre administrateur"}), 403
 
         try:
+            # Ses expériences sont supprimées avec lui (même comptabilité que delete_experience) :
+            # sans cela, la backref Experience.user mettrait user_id à NULL et les compteurs
+            # garderaient des expériences approuvées orphelines
+            experiences = (
+                db.session.query(Experience).filter(Experience.user_id == user_id)
+                .with_for_update().all()
+            )
+            # Compteurs et agrégats de /stats : retrait des expériences approuvées
+            on_status_change_many(experiences, None)
+            for experience in experiences:
+                db.session.delete(experience)
             db.session.delete(target_user)
             db.session.commit()
+            for experience in experiences:
+                simulator_index.discard(experience.id_experience)
+            invalidate_principal(user_id)
+            invalidate_stats()
+            catalogue_cache.invalidate()
             return jsonify({"success": True, "message": "Utilisateur supprimé"}), 200
         except Exception as e:
             db.session.rollback()
@@ -100,14 +186,8 @@ def delete_user(user_id):
 
 # create one or more universities
 @admin_bp.route("/create_univ", methods=["POST"])
-@jwt_required()
+@admin_required
 def create_university():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user or user.role.strip().lower() != "admin":
-        return jsonify({"error": "Accès non autorisé"}), 403
-
     data = request.get_json()
     if not data:
         return jsonify({"error": "Données invalides"}), 400
@@ -137,6 +217,7 @@ def create_university():
 
         db.session.add_all(universities_to_add)
         db.session.commit()
+        catalogue_cache.invalidate()
 
         return jsonify({
             "message": f"{len(universities_to_add)} université(s) créée(s) avec succès",
@@ -154,17 +235,35 @@ def create_university():
 
 
 
+# import en flux du catalogue : ?kind=universities|specialities, corps CSV (text/csv) ou NDJSON
+@admin_bp.route("/catalogue/import", methods=["POST"])
+@admin_required
+def import_catalogue():
+    try:
+        importer = CatalogueImport(request.args.get("kind", ""))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Sans l'index unique, les upserts ON CONFLICT échoueraient au premier lot
+    missing = missing_catalogue_index(importer.kind)
+    if missing:
+        return jsonify({
+            "error": f"Index {missing} absent : lancer la migration 'flask migrate-catalogue' avant l'import",
+        }), 409
+    try:
+        report = importer.run(request.stream, request.content_type)
+    except Exception as e:
+        db.session.rollback()
+        # Les lots précédents sont déjà validés : l'import peut être relancé tel quel
+        return jsonify({"error": str(e), "report": importer.report}), 500
+    return jsonify(report), 200
+
+
+
 # create one or more specialities
 @admin_bp.route("/specialities", methods=["POST"])
-@jwt_required()
+@admin_required
 def create_specialities():
     from models.speciality_model import Speciality
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user or user.role.strip().lower() != "admin":
-        return jsonify({"error": "Accès non autorisé"}), 403
-
     data = request.get_json()
 
     if not data:
@@ -193,6 +292,7 @@ def create_specialities():
 
         db.session.add_all(specialities_to_add)
         db.session.commit()
+        catalogue_cache.invalidate()
 
         return jsonify({
             "message": f"{len(specialities_to_add)} spécialité(s) créée(s) avec succès",
@@ -211,26 +311,18 @@ def create_specialities():
     ########################################################################
 
 @admin_bp.route("stats/users")
-@jwt_required()
+@admin_required
 def getUsers():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user==current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
-        users = db.session.query(User.first_name, User.last_name ,User.email, func.date(User.created_at).label("created_at") ,User.isbanned, User.subscription,User.id_user).all()
-        users_list = [
-            {
-                "id_user": user.id_user,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "email": user.email,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "isbanned": user.isbanned,
-                "subscription": user.subscription
-            } for user in users
-        ]
-        return jsonify(users_list), 200
+        query = db.session.query(User.id_user, User.first_name, User.last_name, User.email, func.date(User.created_at).label("created_at"), User.isbanned, User.subscription)
+        fmt = request.args.get("format", "json")
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format invalide : '{fmt}'"}), 400
+        if wants_page(request.args):
+            return jsonify(keyset_query_page(query, User.id_user, request.args)), 200
+        return stream_query(query.order_by(User.id_user), fmt, filename="users")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -238,18 +330,16 @@ def getUsers():
 
     
 @admin_bp.route("/users/<int:user_id>/ban", methods=["PATCH"])
-@jwt_required()
+@admin_required
 def bannir(user_id):
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
         user = db.session.query(User).filter(User.id_user == user_id).first()
         if not user:
             return jsonify({"error": "Utilisateur non trouvé"}), 404
         user.isbanned = True
         db.session.commit()
+        invalidate_principal(user_id)
+        invalidate_stats()
         return jsonify({"message": "Utilisateur banni avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -257,18 +347,16 @@ def bannir(user_id):
     
 
 @admin_bp.route("users/<int:user_id>/unban", methods=["PATCH"])
-@jwt_required()
+@admin_required
 def unban(user_id):
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
         user= db.session.query(User).filter(User.id_user == user_id).first()
         if not user:
             return jsonify({"error": "Utilisateur non trouvé"}), 404
         user.isbanned = False
         db.session.commit()
+        invalidate_principal(user_id)
+        invalidate_stats()
         return jsonify({"message": "Utilisateur débanni avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -277,6 +365,7 @@ def unban(user_id):
 
 
 @admin_bp.route("/users/<int:user_id>/premuim", methods=["PATCH"])
+@admin_required
 def set_premium(user_id):
     try:
         user =db.session.query(User).filter(User.id_user == user_id).first()
@@ -284,6 +373,7 @@ def set_premium(user_id):
             return jsonify({"error": "Utilisateur non trouvé"}), 404
         user.subscription = True
         db.session.commit()
+        invalidate_stats()
         return jsonify({"message": "Utilisateur mis en premium avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -293,6 +383,7 @@ def set_premium(user_id):
 
 
 @admin_bp.route("/users/<int:user_id>/free", methods=["PATCH"])
+@admin_required
 def set_free(user_id):
     try:
         user = db.session.query(User).filter(User.id_user == user_id).first()
@@ -300,6 +391,7 @@ def set_free(user_id):
             return jsonify({"error": "Utilisateur non trouvé"}), 404
         user.subscription = False
         db.session.commit()
+        invalidate_stats()
         return jsonify({"message": "Utilisateur mis en free avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -308,18 +400,23 @@ def set_free(user_id):
 
 
 @admin_bp.route("experiences/<int:id_experience>/approve",methods=["PATCH"])
-@jwt_required()
+@admin_required
 def approve_experiences(id_experience):
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
-        experience = db.session.query(Experience).filter(Experience.id_experience == id_experience).first()
+        # Verrou de ligne : deux modérations concurrentes lisent l'ancien statut l'une après l'autre
+        experience = (
+            db.session.query(Experience).filter(Experience.id_experience == id_experience)
+            .with_for_update().first()
+        )
         if not experience:
             return jsonify({"error": "Expérience non trouvée"}), 404
+        on_status_change(experience, experience.is_validated, "approved")
         experience.is_validated = "approved"
+        release_claims([id_experience])
         db.session.commit()
+        simulator_index.upsert(experience)
+        invalidate_stats()
+        catalogue_cache.invalidate()
         return jsonify({"message": "Expérience approuvée avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -327,68 +424,82 @@ def approve_experiences(id_experience):
 
 
 @admin_bp.route("experiences/<int:id_experience>/reject",methods=["PATCH"])
-@jwt_required()
+@admin_required
 def reject_experiences(id_experience):
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
-        experience = db.session.query(Experience).filter(Experience.id_experience == id_experience).first()
+        # Verrou de ligne : deux modérations concurrentes lisent l'ancien statut l'une après l'autre
+        experience = (
+            db.session.query(Experience).filter(Experience.id_experience == id_experience)
+            .with_for_update().first()
+        )
         if not experience:  
             return jsonify({"error": "Expérience non trouvée"}), 404
+        on_status_change(experience, experience.is_validated, "rejected")
         experience.is_validated = "rejected"
+        release_claims([id_experience])
         db.session.commit()
+        simulator_index.upsert(experience)
+        invalidate_stats()
+        catalogue_cache.invalidate()
         return jsonify({"message": "Expérience rejetée avec succès"}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
+# modération groupée : {"ids": [...]} ou {"filter": {"status": "pending", "speciality_id": 3, "before_id": 1000, ...}}
+@admin_bp.route("experiences/bulk/<string:action>", methods=["PATCH"])
+@admin_required
+def bulk_moderate_experiences(action):
+    statuses = {"approve": "approved", "reject": "rejected"}
+    if action not in statuses:
+        return jsonify({"error": "action doit être 'approve' ou 'reject'"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        has_more = False
+        if "ids" in data:
+            ids = parse_ids(data["ids"])
+        elif "filter" in data:
+            ids, has_more = select_experience_ids(data["filter"])
+        else:
+            return jsonify({"error": "'ids' ou 'filter' requis"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        outcomes = moderate_experiences(ids, statuses[action]) if ids else {}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    # has_more : le filtre correspond à plus de lignes que la limite, relancer la même requête
+    return jsonify(dict(outcome_response(outcomes), has_more=has_more)), 200
+
+
+# bannissement groupé : {"ids": [...]}
+@admin_bp.route("users/bulk/<string:action>", methods=["PATCH"])
+@admin_required
+def bulk_ban_users(action):
+    if action not in ("ban", "unban"):
+        return jsonify({"error": "action doit être 'ban' ou 'unban'"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = parse_ids(data.get("ids"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        outcomes = set_users_banned(ids, action == "ban", acting_user_id=get_current_user().id_user)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    return jsonify(outcome_response(outcomes)), 200
+
+
 @admin_bp.route("all_stats",methods=["GET"])
-@jwt_required()
+@admin_required
 def all_stats():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
-
-        # Statistiques des utilisateurs
-        total_users = db.session.query(func.count(User.id_user)).scalar()
-        active_users = db.session.query(func.count(User.id_user)).filter(User.isbanned == False).scalar()
-        premium_users = db.session.query(func.count(User.id_user)).filter(User.subscription == True).scalar()
-        taux_conversion = (premium_users / total_users) * 100 if total_users > 0 else 0
-        users_banned = total_users - active_users
-        taux_conversion_last_30_days = 0
-        import datetime
-        thirty_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=30)
-        new_users_last_30_days = db.session.query(func.count(User.id_user)).filter(User.created_at >= thirty_days_ago).scalar()
-        if total_users > 0:
-            taux_conversion_last_30_days = (new_users_last_30_days / total_users) * 100
-
-
-        # Statistiques des expériences
-        total_experiences = db.session.query(func.count(Experience.id_experience)).scalar()
-        pending_experiences = db.session.query(func.count(Experience.id_experience)).filter(Experience.is_validated == "pending").scalar()
-        approved_experiences = db.session.query(func.count(Experience.id_experience)).filter(Experience.is_validated == "approved").scalar()
-        rejected_experiences = db.session.query(func.count(Experience.id_experience)).filter(Experience.is_validated == "rejected").scalar()
-        taux_approbation = (approved_experiences / total_experiences) * 100 if total_experiences > 0 else 0
-
-        stats = {
-            "total_users": total_users,
-            "active_users": active_users,
-            "premium_users": premium_users,
-            "total_experiences": total_experiences,
-            "pending_experiences": pending_experiences,
-            "approved_experiences": approved_experiences,
-            "rejected_experiences": rejected_experiences,
-            "taux_conversion": taux_conversion,
-            "taux_approbation": taux_approbation,
-            "banned_users_count": users_banned,
-            "new_users_last_30_days": new_users_last_30_days,
-            "taux_conversion_last_30_days": taux_conversion_last_30_days
-        }
+        stats = get_stats()
 
         return jsonify(stats), 200
 
@@ -397,4 +508,8 @@ def all_stats():
         return jsonify({"error": str(e)}), 500
 
 
-
+# métriques du pool de connexions (processus courant)
+@admin_bp.route("pool_stats", methods=["GET"])
+@admin_required
+def pool_stats():
+    return jsonify(pool_metrics.snapshot(db.engine.pool)), 200
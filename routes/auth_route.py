@@ -7,8 +7,10 @@ from utils.token import confirm_token
 from utils.email import send_verification_email , send_password_reset_email
 from utils.helpers import hash_password,verify_password, get_serializer
 from sqlalchemy.exc import SQLAlchemyError
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
-from utils.jwt_blacklist import blacklisted_tokens
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt, get_current_user
+from utils.auth import role_claims, load_principal
+from utils.jwt_blacklist import get_revocation_store
+from utils.admin_stats import invalidate_stats
 
 
 
@@ -56,8 +58,9 @@ def create_user():
             role=data.get('role', 'user')
         )
         db.session.add(new_user)
-        db.session.commit()
         send_verification_email(new_user)
+        db.session.commit()
+        invalidate_stats()
         return jsonify({"message": "Utilisateur créé. Vérifiez votre email pour activer votre compte."}), 201
 
     except Exception as e:
@@ -88,8 +91,9 @@ def login():
     verif = verify_password(password, password_hash)
     if not verif:
         return jsonify({"error": "Mot de passe incorrect"}), 401
-    access_token = create_access_token(identity=str(user.id_user))
-    refresh_token = create_access_token(identity=str(user.id_user))
+    # Le rôle est embarqué dans le jeton : les contrôles d'autorisation n'interrogent pas la base
+    access_token = create_access_token(identity=str(user.id_user), additional_claims=role_claims(user))
+    refresh_token = create_access_token(identity=str(user.id_user), additional_claims=role_claims(user))
     return jsonify({
         "message": "Connexion réussie",
         "access_token": access_token,
@@ -99,8 +103,7 @@ def login():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    jti = get_jwt()["jti"]
-    blacklisted_tokens.add(jti)
+    get_revocation_store().revoke(get_jwt())
     return jsonify({"message": "Déconnexion réussie"}), 200
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -108,7 +111,9 @@ def logout():
 def refresh():
     from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
     current_user_id = get_jwt_identity()
-    new_access_token = create_access_token(identity=current_user_id)
+    principal = load_principal(current_user_id)
+    claims = {"role": principal.role} if principal else {}
+    new_access_token = create_access_token(identity=current_user_id, additional_claims=claims)
     return jsonify({"access_token": new_access_token}), 200
 
 
@@ -130,8 +135,8 @@ def change_password():
         return jsonify({"error": "Mot de passe actuel incorrect"}), 401
     user.password = hash_password(data['new_password'])
     try:
-        db.session.commit()
         send_password_reset_email(user)
+        db.session.commit()
         return jsonify({"message": "Mot de passe modifié avec succès"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -158,8 +163,10 @@ def send_reset_password_email():
 
     try:
         send_password_reset_email(user)
+        db.session.commit()
         return jsonify({"message": "Vérifiez votre email pour changer votre mot de passe."}), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": f"Erreur lors de l'envoi de l'email: {str(e)}"}), 500
 
 
@@ -224,9 +231,8 @@ def password_reset_success():
 @jwt_required()
 def isadmin():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user==current_user_id).first()
-        
+        current_user = get_current_user()
+
         if not current_user:
             return jsonify({
                 'error': 'Utilisateur non trouvé',
@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from models.user_model import User
+from utils.admin_stats import invalidate_stats
+from utils.auth import admin_required
+from utils.experience_averages import average_rows
 experience_bp = Blueprint("experience", __name__, url_prefix="/experience")
 
 
@@ -16,7 +18,7 @@ def create_experience():
     # ✅ CORRECTION : Champs vraiment requis seulement
     required_fields = [
         "speciality_id", "university_ids", "candidature_year",
-        "comment", "is_validated",
+        "comment",
         "study_year_at_application_time", "application_year", "level_tcf"
     ]
     # ❌ ENLEVÉ : "university_accepted_in", "university_rejected_in" (pas toujours requis)
@@ -101,7 +103,8 @@ def create_experience():
             application_year=data["application_year"],
             average_each_year=avg_dict,
             comment=data["comment"],
-            is_validated=data.get("is_validated"),
+            # Toujours en attente : seule la modération admin peut approuver (un is_validated envoyé est ignoré)
+            is_validated="pending",
             bac_type=bac_type,
             bac_average=bac_average,
             study_year_at_application_time=data["study_year_at_application_time"],
@@ -110,11 +113,12 @@ def create_experience():
             # ✅ AJOUT : Nouveaux champs pour universités acceptées/refusées
             university_accepted_in=accepted_unis,
             university_rejected_in=rejected_unis,
-            
+            averages=average_rows(avg_dict),
         )
 
         db.session.add(new_exp)
         db.session.commit()
+        invalidate_stats()
 
         return jsonify({
             "message": "Expérience créée avec succès",
@@ -132,264 +136,63 @@ def create_experience():
 from models.experiences_model import Experience
 from models.speciality_model import Speciality
 from models.university_model import University
+from utils.experience_resolver import filter_experiences, keyset_page, explorer_query, resolve_experience_rows
+from utils.pagination import parse_limit
+from utils.export import stream_query, keyset_query_page, wants_page
 
 
+# Explorer : ?speciality_id=&university_id=&application_year=&bac_type=&tcf_min=&tcf_max=&bac_min=&bac_max=
+# et moyenne d'une année : &avg_level=L3&avg_min=&avg_max= ; ?limit=&cursor= pour paginer par curseur
 @experience_bp.route("/explorer", methods=["GET"])
 def get_experiences():
     try:
-        print("🚀 Début de get_experiences")  # Debug log
-        
-        # dictionnaire de correspondance
-        year_mapping = {
-            1: "L1",
-            2: "L2",
-            3: "L3",
-            4: "M1",
-            5: "M2"
-        }
-
-        experiences = Experience.query.filter_by(is_validated="approved").all()
-        print(f"📊 Nombre d'expériences trouvées: {len(experiences)}")  # Debug log
-        
-        result = []
-
-        for exp in experiences:
-            try:
-                print(f"🔄 Traitement expérience ID: {exp.id_experience}")  # Debug log
-                
-                # ✅ CORRECTION : Utiliser un dictionnaire manuel au lieu de exp.to_dict()
-                exp_data = {
-                    "id_experience": exp.id_experience,
-                    "user_id": exp.user_id,
-                    "bac_type": exp.bac_type,
-                    "bac_average": exp.bac_average,
-                    "comment": exp.comment,
-                    "application_year": exp.application_year,
-                    "study_year_at_application_time": exp.study_year_at_application_time,
-                    "average_each_year": exp.average_each_year or {},
-                    "level_tcf": exp.level_tcf,
-                    "candidature_year": exp.candidature_year,
-                    "speciality_id": exp.speciality_id,
-                    "is_validated": exp.is_validated
-                }
-
-                # Transformer candidature_year numérique en label lisible
-                if exp_data.get("candidature_year") in year_mapping:
-                    exp_data["candidature_year"] = year_mapping[exp_data["candidature_year"]]
-
-                # ✅ AJOUT : Récupérer les universités acceptées
-                accepted_universities = []
-                if exp.university_accepted_in:
-                    print(f"🎯 university_accepted_in: {exp.university_accepted_in}")
-                    # Si c'est un tableau (peut contenir des IDs ou des noms)
-                    if isinstance(exp.university_accepted_in, list):
-                        for item in exp.university_accepted_in:
-                            if item and str(item).strip():
-                                # Essayer d'abord comme un ID
-                                try:
-                                    univ_id = int(item)
-                                    univ = University.query.get(univ_id)
-                                    if univ:
-                                        accepted_universities.append(f"{univ.univ_name} ({univ.city})")
-                                    else:
-                                        accepted_universities.append(str(item))
-                                except (ValueError, TypeError):
-                                    # Si ce n'est pas un ID, traiter comme un nom
-                                    accepted_universities.append(str(item).strip())
-                
-                exp_data["university_accepted_in"] = accepted_universities
-
-                # ✅ AJOUT : Récupérer les universités refusées  
-                rejected_universities = []
-                if exp.university_rejected_in:
-                    print(f"🎯 university_rejected_in: {exp.university_rejected_in}")
-                    # Si c'est un tableau (peut contenir des IDs ou des noms)
-                    if isinstance(exp.university_rejected_in, list):
-                        for item in exp.university_rejected_in:
-                            if item and str(item).strip():
-                                # Essayer d'abord comme un ID
-                                try:
-                                    univ_id = int(item)
-                                    univ = University.query.get(univ_id)
-                                    if univ:
-                                        rejected_universities.append(f"{univ.univ_name} ({univ.city})")
-                                    else:
-                                        rejected_universities.append(str(item))
-                                except (ValueError, TypeError):
-                                    # Si ce n'est pas un ID, traiter comme un nom
-                                    rejected_universities.append(str(item).strip())
-                
-                exp_data["university_rejected_in"] = rejected_universities
-
-                # Enrichir avec spécialité
-                if exp.speciality:
-                    exp_data["speciality"] = {
-                        "id_speciality": exp.speciality.id_speciality,
-                        "speciality_name": exp.speciality.speciality_name
-                    }
-                else:
-                    exp_data["speciality"] = None
-
-                # Enrichir avec universités (celles ciblées)
-                exp_data["universities"] = []
-                for univ in exp.universities:
-                    exp_data["universities"].append({
-                        "id_university": univ.id_university,
-                        "univ_name": univ.univ_name,
-                        "city": univ.city
-                    })
-
-                result.append(exp_data)
-                print(f"✅ Expérience {exp.id_experience} traitée avec succès")
-                
-            except Exception as exp_error:
-                print(f"❌ Erreur lors du traitement de l'expérience {exp.id_experience}: {str(exp_error)}")
-                print(f"❌ Détails de l'erreur: {type(exp_error).__name__}")
-                import traceback
-                traceback.print_exc()
-                continue  # Continuer avec les autres expériences
-
-        print(f"✅ Nombre d'expériences traitées avec succès: {len(result)}")  # Debug log
-        print(f"🎯 Résultat final: {result}")  # Debug log - pour voir la structure exacte
-        
-        return jsonify(result), 200
-
+        query = filter_experiences(explorer_query().filter(Experience.is_validated == "approved"), request.args)
+        if wants_page(request.args):
+            limit = parse_limit(request.args.get("limit"))
+            rows, next_cursor = keyset_page(query, request.args.get("cursor"), limit)
+            return jsonify({
+                "items": resolve_experience_rows(rows),
+                "next_cursor": next_cursor,
+                "limit": limit
+            }), 200
+        return jsonify(resolve_experience_rows(query.all())), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"❌ Erreur générale dans get_experiences: {str(e)}")  # Debug log
-        print(f"❌ Type d'erreur: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
         return jsonify({"error": str(e)}), 500
-    
-
 
 
 @experience_bp.route("/<int:experience_id>", methods=["GET"])
 def get_experience_by_id(experience_id):
     try:
-        print(f"🚀 Début de get_experience_by_id pour ID: {experience_id}")  # Debug log
-
-        # dictionnaire de correspondance
-        year_mapping = {
-            1: "L1",
-            2: "L2",
-            3: "L3",
-            4: "M1",
-            5: "M2"
-        }
-
-        exp = Experience.query.get(experience_id)
-        if not exp:
-            print(f"❌ Aucune expérience trouvée avec ID: {experience_id}")
+        # Même requête de colonnes et même sérialisation que l'explorer
+        rows = explorer_query().filter(Experience.id_experience == experience_id).all()
+        if not rows:
             return jsonify({"error": "Experience not found"}), 404
-
-        print(f"🔄 Traitement expérience ID: {exp.id_experience}")  # Debug log
-
-        exp_data = {
-            "id_experience": exp.id_experience,
-            "user_id": exp.user_id,
-            "bac_type": exp.bac_type,
-            "bac_average": exp.bac_average,
-            "comment": exp.comment,
-            "application_year": exp.application_year,
-            "study_year_at_application_time": exp.study_year_at_application_time,
-            "average_each_year": exp.average_each_year or {},
-            "level_tcf": exp.level_tcf,
-            "candidature_year": exp.candidature_year,
-            "speciality_id": exp.speciality_id,
-            "is_validated": exp.is_validated
-        }
-
-        # Transformer candidature_year numérique en label lisible
-        if exp_data.get("candidature_year") in year_mapping:
-            exp_data["candidature_year"] = year_mapping[exp_data["candidature_year"]]
-
-        # ✅ Universités acceptées
-        accepted_universities = []
-        if exp.university_accepted_in:
-            if isinstance(exp.university_accepted_in, list):
-                for item in exp.university_accepted_in:
-                    if item and str(item).strip():
-                        try:
-                            univ_id = int(item)
-                            univ = University.query.get(univ_id)
-                            if univ:
-                                accepted_universities.append(f"{univ.univ_name} ({univ.city})")
-                            else:
-                                accepted_universities.append(str(item))
-                        except (ValueError, TypeError):
-                            accepted_universities.append(str(item).strip())
-        exp_data["university_accepted_in"] = accepted_universities
-
-        # ✅ Universités refusées
-        rejected_universities = []
-        if exp.university_rejected_in:
-            if isinstance(exp.university_rejected_in, list):
-                for item in exp.university_rejected_in:
-                    if item and str(item).strip():
-                        try:
-                            univ_id = int(item)
-                            univ = University.query.get(univ_id)
-                            if univ:
-                                rejected_universities.append(f"{univ.univ_name} ({univ.city})")
-                            else:
-                                rejected_universities.append(str(item))
-                        except (ValueError, TypeError):
-                            rejected_universities.append(str(item).strip())
-        exp_data["university_rejected_in"] = rejected_universities
-
-        # ✅ Spécialité
-        if exp.speciality:
-            exp_data["speciality"] = {
-                "id_speciality": exp.speciality.id_speciality,
-                "speciality_name": exp.speciality.speciality_name
-            }
-        else:
-            exp_data["speciality"] = None
-
-        # ✅ Universités ciblées
-        exp_data["universities"] = []
-        for univ in exp.universities:
-            exp_data["universities"].append({
-                "id_university": univ.id_university,
-                "univ_name": univ.univ_name,
-                "city": univ.city
-            })
-
-        print(f"✅ Expérience {exp.id_experience} traitée avec succès")
-        return jsonify(exp_data), 200
+        return jsonify(resolve_experience_rows(rows)[0]), 200
 
     except Exception as e:
-        print(f"❌ Erreur générale dans get_experience_by_id: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("Erreur dans get_experience_by_id (%s)", experience_id)
         return jsonify({"error": str(e)}), 500
 
 
 @experience_bp.route("/summary", methods=["GET"])
-@jwt_required()
+@admin_required
 def get_experience_summary():
     
+    # Une seule requête (jointure externe sur l'auteur) ; ?limit=&cursor= pour paginer
+    query = (
+        db.session.query(
+            Experience.id_experience, Experience.user_id, User.first_name, User.last_name,
+            Experience.comment, Experience.is_validated,
+        )
+        .outerjoin(User, User.id_user == Experience.user_id)
+    )
     try:
-        current_user_id = get_jwt_identity()
-        current_user = db.session.query(User).filter(User.id_user == current_user_id).first()
-        if not current_user or current_user.role.strip().lower() != "admin":
-            return jsonify({"error": "Accès non autorisé"}), 403
-        experiences = Experience.query.all()
-        data = []
-
-        for exp in experiences:
-            user = User.query.get(exp.user_id)
-            data.append({
-                "id_experience": exp.id_experience,
-                "user_id": exp.user_id,
-                "first_name": user.first_name if user else None,
-                "last_name": user.last_name if user else None,
-                "comment": exp.comment,
-                "is_validated":exp.is_validated
-            })
-
-        return jsonify(data), 200
-
+        if wants_page(request.args):
+            return jsonify(keyset_query_page(query, Experience.id_experience, request.args)), 200
+        return stream_query(query.order_by(Experience.id_experience))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -3,32 +3,26 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.grades_model import Grade
 from models.user_model import User
 from app import db
+from utils.auth import admin_required
+from utils.grades_import import validate_grade, upsert_grades, import_grades
 grades_bp = Blueprint("grades", __name__, url_prefix="/grades")
 
 @grades_bp.route("/grades", methods=["POST"])
 @jwt_required()
 def add_grades():
-    current_user_id = get_jwt_identity()
-    data = request.get_json()
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
     grades_data = data.get("grades")
     if not grades_data or not isinstance(grades_data, list):
         return jsonify({"error": "Format des notes invalide"}), 400
 
-    for grade in grades_data:
-        level = grade.get("level")
-        average = grade.get("average")
-
-        if not level or not isinstance(average, (int, float)):
-            return jsonify({"error": f"Données invalides pour {grade}"}), 400
-
-        # Vérifier si la moyenne existe déjà
-        existing = Grade.query.filter_by(user_id=current_user_id, level=level).first()
-        if existing:
-            existing.average = average  # mise à jour
-        else:
-            new_grade = Grade(user_id=current_user_id, level=level, average=average)
-            db.session.add(new_grade)
+    # Validation complète avant toute écriture
+    try:
+        rows = [(current_user_id, *validate_grade(grade)) for grade in grades_data]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    upsert_grades(rows)
     db.session.commit()
     return jsonify({"message": "Notes enregistrées avec succès"}), 201
 
@@ -46,3 +40,15 @@ def get_user_grades():
     ]
 
     return jsonify(result), 200
+
+
+# Import admin en masse : corps NDJSON (application/x-ndjson) ou CSV (text/csv), colonnes user_id, level, average
+@grades_bp.route("/import", methods=["POST"])
+@admin_required
+def import_grades_bulk():
+    try:
+        report = import_grades(request.stream, request.content_type)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    return jsonify(report), 200
@@ -0,0 +1,158 @@
+import datetime
+from flask import Blueprint, request, jsonify, Response, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import tuple_
+from models.message_model import Message
+from models.service_model import Service
+from models.user_model import User
+from app import db
+from utils.messaging import message_hub, sse_stream
+from utils.unread_counters import increment_unread, decrement_unread, get_unread
+from utils.pagination import parse_limit, decode_cursor, page_response
+from utils.moderation import parse_ids
+
+messages_bp = Blueprint("messages", __name__, url_prefix="/messages")
+
+
+# envoyer un message
+@messages_bp.route("/", methods=["POST"])
+@jwt_required()
+def send_message():
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Aucune donnée JSON reçue ou format invalide."}), 400
+    missing_fields = [field for field in ("receiver_id", "service_id", "message") if not data.get(field)]
+    if missing_fields:
+        return jsonify({"error": f"Champs manquants: {', '.join(missing_fields)}"}), 400
+    try:
+        receiver_id = int(data["receiver_id"])
+        service_id = int(data["service_id"])
+    except (ValueError, TypeError):
+        return jsonify({"error": "'receiver_id' et 'service_id' doivent être des entiers"}), 400
+    if receiver_id == current_user_id:
+        return jsonify({"error": "Vous ne pouvez pas vous envoyer un message"}), 400
+    if not db.session.query(User.id_user).filter(User.id_user == receiver_id).first():
+        return jsonify({"error": "Destinataire introuvable"}), 404
+    if not db.session.query(Service.id_service).filter(Service.id_service == service_id).first():
+        return jsonify({"error": "Service introuvable"}), 404
+
+    try:
+        message = Message(
+            sender_id=current_user_id,
+            receiver_id=receiver_id,
+            service_id=service_id,
+            message=data["message"],
+            media=data.get("media"),
+            media_type=data.get("media_type"),
+        )
+        db.session.add(message)
+        db.session.flush()
+        db.session.refresh(message)  # created_at (server_default)
+        increment_unread(receiver_id, current_user_id)
+        payload = message.to_dict()
+        message_hub.publish(receiver_id, {"type": "message", "data": payload})
+        db.session.commit()
+        return jsonify(payload), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+# historique d'une conversation, du plus récent au plus ancien (?limit=&cursor=)
+@messages_bp.route("/conversations/<int:other_user_id>", methods=["GET"])
+@jwt_required()
+def get_conversation(other_user_id):
+    current_user_id = int(get_jwt_identity())
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        after = decode_cursor(request.args.get("cursor"), 2, (datetime.datetime.fromisoformat, int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    order = (Message.created_at.desc(), Message.id_message.desc())
+
+    def direction(sender_id, receiver_id):
+        # Un sens = un parcours ordonné de l'index (sender_id, receiver_id, created_at, id_message), arrêté à limit + 1
+        query = Message.query.filter(Message.sender_id == sender_id, Message.receiver_id == receiver_id)
+        if after is not None:
+            query = query.filter(tuple_(Message.created_at, Message.id_message) < tuple_(*after))
+        return query.order_by(*order).limit(limit + 1)
+
+    # UNION ALL des deux sens puis fusion : au plus 2 * (limit + 1) lignes triées, jamais toute la conversation
+    messages = (
+        direction(current_user_id, other_user_id)
+        .union_all(direction(other_user_id, current_user_id))
+        .order_by(*order)
+        .limit(limit + 1)
+        .all()
+    )
+    messages, next_cursor = page_response(messages, limit, lambda m: (m.created_at.isoformat(), m.id_message))
+    return jsonify({
+        "items": [m.to_dict() for m in messages],
+        "next_cursor": next_cursor,
+        "limit": limit
+    }), 200
+
+
+# marquer comme lus : {"message_ids": [...]} ou {"sender_id": X} (toute la conversation)
+@messages_bp.route("/read", methods=["POST"])
+@jwt_required()
+def mark_as_read():
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Aucune donnée JSON reçue ou format invalide."}), 400
+
+    query = Message.query.filter(Message.receiver_id == current_user_id, Message.is_read == False)
+    if data.get("message_ids") is not None:
+        try:
+            query = query.filter(Message.id_message.in_(parse_ids(data["message_ids"], field="message_ids")))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    elif data.get("sender_id") is not None:
+        sender_id = data["sender_id"]
+        if isinstance(sender_id, bool) or not isinstance(sender_id, int):
+            return jsonify({"error": "'sender_id' doit être un entier"}), 400
+        query = query.filter(Message.sender_id == sender_id)
+    else:
+        return jsonify({"error": "'message_ids' (liste) ou 'sender_id' requis"}), 400
+
+    try:
+        # Un seul UPDATE ... RETURNING pour tout le lot
+        updated = db.session.execute(
+            Message.__table__.update()
+            .where(query.whereclause)
+            .values(is_read=True)
+            .returning(Message.id_message, Message.sender_id)
+        ).all()
+        by_sender = {}
+        for message_id, sender_id in updated:
+            by_sender.setdefault(sender_id, []).append(message_id)
+        decrement_unread(current_user_id, {sender_id: len(ids) for sender_id, ids in by_sender.items()})
+        for sender_id, message_ids in by_sender.items():
+            message_hub.publish(sender_id, {"type": "read", "data": {"reader_id": current_user_id, "message_ids": message_ids}})
+        db.session.commit()
+        return jsonify({"updated": len(updated)}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+# flux temps réel (Server-Sent Events) : événements "message" et "read"
+@messages_bp.route("/stream", methods=["GET"])
+@jwt_required()
+def stream():
+    current_user_id = int(get_jwt_identity())
+    heartbeat = current_app.config.get("MESSAGING_HEARTBEAT", 15)
+    response = Response(sse_stream(current_user_id, heartbeat), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# compteurs de messages non lus (badge) : lecture O(1), sans COUNT sur messagerie
+@messages_bp.route("/unread", methods=["GET"])
+@jwt_required()
+def unread_counts():
+    return jsonify(get_unread(int(get_jwt_identity()))), 200
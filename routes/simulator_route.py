@@ -0,0 +1,73 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.user_model import User
+from models.grades_model import Grade
+from models.university_model import University
+from models.speciality_model import Speciality
+from utils.simulator import simulator_index, profile_vector, acceptance_rates
+
+simulator_bp = Blueprint("simulator", __name__, url_prefix="/simulator")
+
+DEFAULT_K = 20
+MAX_K = 200
+
+
+# Classement des spécialités/universités selon les expériences les plus proches du profil
+@simulator_bp.route("/", methods=["POST"])
+@jwt_required()
+def simulate():
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Format des données invalide"}), 400
+    try:
+        k = min(int(data.get("k", DEFAULT_K)), MAX_K)
+    except (ValueError, TypeError):
+        return jsonify({"error": "'k' doit être un entier"}), 400
+    if k <= 0:
+        return jsonify({"error": "'k' doit être un entier positif"}), 400
+
+    overrides = data.get("profile")
+    if overrides is not None and not isinstance(overrides, dict):
+        return jsonify({"error": "'profile' doit être un objet JSON"}), 400
+
+    try:
+        simulator_index.ensure_fresh()
+        grades = Grade.query.filter_by(user_id=current_user_id).all()
+        profile = profile_vector(user, grades, overrides)
+        neighbours = simulator_index.nearest(profile, k)
+        universities, specialities = acceptance_rates(neighbours)
+
+        # Noms résolus en deux requêtes IN
+        univ_names = {
+            u.id_university: f"{u.univ_name} ({u.city})"
+            for u in University.query.filter(University.id_university.in_([u["university_id"] for u in universities])).all()
+        } if universities else {}
+        spec_names = {
+            s.id_speciality: s.speciality_name
+            for s in Speciality.query.filter(Speciality.id_speciality.in_([s["speciality_id"] for s in specialities])).all()
+        } if specialities else {}
+        for item in universities:
+            item["univ_name"] = univ_names.get(item["university_id"])
+        for item in specialities:
+            item["speciality_name"] = spec_names.get(item["speciality_id"])
+
+        return jsonify({
+            "neighbours": [
+                {
+                    "id_experience": record["id_experience"],
+                    "speciality_id": record["speciality_id"],
+                    "university_accepted_in": record["accepted"],
+                    "university_rejected_in": record["rejected"],
+                    "distance": distance
+                } for record, distance in neighbours
+            ],
+            "universities": universities,
+            "specialities": specialities
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
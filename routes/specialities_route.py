@@ -3,13 +3,16 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.speciality_model import Speciality
 from models.user_model import User
 from app import db
+from utils.search import fuzzy_search, autocomplete, matches_name
+from utils.pagination import parse_limit
+from utils.catalogue import catalogue_cache, json_response
 
 specialities_bp = Blueprint("specialities", __name__, url_prefix="/specialities")
 
 #get speciality_id by name
 @specialities_bp.route("/<string:speciality_name>", methods=["GET"])
 def get_speciality_by_name(speciality_name):
-    speciality = Speciality.query.filter_by(name=speciality_name).first()
+    speciality = Speciality.query.filter(matches_name(Speciality.speciality_name, speciality_name)).first()
     if not speciality:
         return jsonify({"error": "Spécialité non trouvée"}), 404
     return jsonify(speciality.to_dict()), 200
@@ -17,5 +20,22 @@ def get_speciality_by_name(speciality_name):
 #get all specialities
 @specialities_bp.route("/", methods=["GET"])    
 def get_all_specialities():
-    specialities = Speciality.query.all()
-    return jsonify([s.to_dict() for s in specialities]), 200
+    return json_response(catalogue_cache.get("specialities"))
+
+# recherche floue des spécialités (insensible aux accents, classée par pertinence)
+@specialities_bp.route("/search", methods=["GET"])
+def search_specialities():
+    term = request.args.get("q")
+    if not term:
+        return jsonify({"error": "Paramètre 'q' requis"}), 400
+    try:
+        limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results = fuzzy_search(Speciality, [Speciality.speciality_name], term, limit)
+    return jsonify([dict(s.to_dict(), score=score) for s, score in results]), 200
+
+# autocomplétion des noms de spécialités
+@specialities_bp.route("/autocomplete", methods=["GET"])
+def autocomplete_specialities():
+    return jsonify(autocomplete(Speciality, Speciality.speciality_name, Speciality.id_speciality, request.args.get("q", ""))), 200
@@ -0,0 +1,64 @@
+from flask import Blueprint, request, jsonify
+from utils.acceptance_stats import DIMENSIONS, acceptance_stats
+from utils.pagination import parse_limit
+
+stats_bp = Blueprint("stats", __name__, url_prefix="/stats")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _filters(args, fixed=None):
+    filters = dict(fixed or {})
+    for name in DIMENSIONS:
+        value = args.get(name)
+        if value in (None, "") or name in filters:
+            continue
+        if name == "bac_type":
+            filters[name] = value
+            continue
+        try:
+            filters[name] = int(value)
+        except ValueError:
+            raise ValueError(f"'{name}' doit être un entier")
+    return filters
+
+
+def _group_by(args, default):
+    group_by = [name.strip() for name in args.get("group_by", default).split(",") if name.strip()]
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"group_by invalide : {', '.join(unknown)} (valeurs : {', '.join(DIMENSIONS)})")
+    return list(dict.fromkeys(group_by))
+
+
+def _stats_response(fixed, default_group_by):
+    try:
+        filters = _filters(request.args, fixed)
+        group_by = _group_by(request.args, default_group_by)
+        limit = parse_limit(request.args.get("limit"), default=DEFAULT_LIMIT, maximum=MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "filters": filters,
+        "group_by": group_by,
+        "items": acceptance_stats(filters, group_by, limit)
+    }), 200
+
+
+# taux d'acceptation agrégés : ?speciality=&university=&year=&bac_type=&group_by=speciality,university,year,bac_type&limit=
+@stats_bp.route("/acceptance", methods=["GET"])
+def get_acceptance_stats():
+    return _stats_response(None, "speciality,university,year,bac_type")
+
+
+# par spécialité pour une université donnée
+@stats_bp.route("/universities/<int:university_id>", methods=["GET"])
+def get_university_stats(university_id):
+    return _stats_response({"university": university_id}, "speciality")
+
+
+# par université pour une spécialité donnée
+@stats_bp.route("/specialities/<int:speciality_id>", methods=["GET"])
+def get_speciality_stats(speciality_id):
+    return _stats_response({"speciality": speciality_id}, "university")
@@ -1,8 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
 from models.university_model import University
-from models.user_model import User
 from app import db
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.auth import admin_required
+from utils.search import fuzzy_search, autocomplete, contains, matches_name
+from utils.pagination import parse_limit
+from utils.catalogue import catalogue_cache, json_response
+from utils.outcomes import OUTCOMES, outcome_filter, university_outcome_counts
+from utils.experience_resolver import explorer_query, resolve_experience_rows, keyset_page
+from models.experiences_model import Experience
 
 universities_bp = Blueprint("universities", __name__, url_prefix="/universities")
 
@@ -10,23 +15,42 @@ universities_bp = Blueprint("universities", __name__, url_prefix="/universities"
 # get all universities
 @universities_bp.route("/", methods=["GET"])
 def get_universities():
-    universities = University.query.all()
-    return jsonify([u.to_dict() for u in universities]), 200
+    return json_response(catalogue_cache.get("universities"))
 
 # get university by id
 @universities_bp.route("/<int:university_id>", methods=["GET"])
 def get_university(university_id):
-    university = University.query.get_or_404(university_id)
-    return jsonify(university.to_dict()), 200
+    entry = catalogue_cache.get("university", university_id)
+    if entry is None:
+        abort(404)
+    return json_response(entry)
+
+# résultats d'admission pour une université : compteurs + expériences (?outcome=accepted|rejected|all&limit=&cursor=)
+@universities_bp.route("/<int:university_id>/outcomes", methods=["GET"])
+def get_university_outcomes(university_id):
+    if catalogue_cache.get("university", university_id) is None:
+        abort(404)
+    outcome = request.args.get("outcome", "all")
+    if outcome not in OUTCOMES:
+        return jsonify({"error": "outcome doit être 'accepted', 'rejected' ou 'all'"}), 400
+    try:
+        limit = parse_limit(request.args.get("limit"), default=20)
+        query = explorer_query().filter(Experience.is_validated == "approved", outcome_filter(university_id, outcome))
+        rows, next_cursor = keyset_page(query, request.args.get("cursor"), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "university_id": university_id,
+        "counts": university_outcome_counts(university_id),
+        "items": resolve_experience_rows(rows),
+        "next_cursor": next_cursor,
+        "limit": limit
+    }), 200
 
 # update university
 @universities_bp.route("/<int:university_id>", methods=["PUT"])
-@jwt_required()
+@admin_required
 def update_university(university_id):
-    current_user_id = get_jwt_identity()    
-    user = User.query.get(current_user_id)
-    if not user or user.role.strip().lower() != "admin":
-        return jsonify({"error": "Accès non autorisé"}), 403
     university = University.query.get_or_404(university_id)
     data = request.get_json()
     if not data or not isinstance(data, dict):
@@ -34,51 +58,59 @@ def update_university(university_id):
     for key, value in data.items():
         setattr(university, key, value)
     db.session.commit()
+    catalogue_cache.invalidate()
     return jsonify({"message": "Université mise à jour avec succès", "university": university.to_dict()}), 200
 
 # delete university
 @universities_bp.route("/<int:university_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def delete_university(university_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user or user.role.strip().lower() != "admin":
-        return jsonify({"error": "Accès non autorisé"}), 403
     university = University.query.get_or_404(university_id)
     db.session.delete(university)
     db.session.commit()
+    catalogue_cache.invalidate()
     return jsonify({"message": "Université supprimée avec succès"}), 200
 
 # get universities by city
 @universities_bp.route("/city/<string:city_name>", methods=["GET"])
 def get_universities_by_city(city_name):
-    universities = University.query.filter_by(city=city_name).all()
-    if not universities:
+    entry = catalogue_cache.get("city", city_name)
+    if entry is None:
         return jsonify({"error": "Aucune université trouvée dans cette ville"}), 404
-    return jsonify([u.to_dict() for u in universities]), 200
+    return json_response(entry)
 
 #get univ        
 @universities_bp.route("/<string:university_name>", methods=["GET"])
 def get_university_by_name(university_name):
-    university = University.query.filter_by(name=university_name).first()
+    university = University.query.filter(matches_name(University.univ_name, university_name)).first()
     if not university:
         return jsonify({"error": "Université non trouvée"}), 404
     return jsonify(university.to_dict()), 200
 
-# get universities by name and city
+# get universities by name and city (recherche floue, insensible aux accents)
 @universities_bp.route("/search", methods=["GET"])
 def search_universities():
-    name = request.args.get("name")
+    name = request.args.get("name") or request.args.get("q")
     city = request.args.get("city")
-    query = University.query
+    try:
+        limit = parse_limit(request.args.get("limit"), default=20, maximum=100)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not name and not city:
+        return jsonify({"error": "Paramètre 'name' ou 'city' requis"}), 400
     if name:
-        query = query.filter(University.name.ilike(f"%{name}%"))
-    if city:
-        query = query.filter(University.city.ilike(f"%{city}%"))
-    universities = query.all()
-    if not universities:
+        filters = [contains(University.city, city)] if city else []
+        results = fuzzy_search(University, [University.univ_name], name, limit, filters)
+    else:
+        results = fuzzy_search(University, [University.city], city, limit)
+    if not results:
         return jsonify({"error": "Aucune université trouvée"}), 404
-    return jsonify([u.to_dict() for u in universities]), 200
+    return jsonify([dict(u.to_dict(), score=score) for u, score in results]), 200
+
+# autocomplétion des noms d'universités
+@universities_bp.route("/autocomplete", methods=["GET"])
+def autocomplete_universities():
+    return jsonify(autocomplete(University, University.univ_name, University.id_university, request.args.get("q", ""))), 200
 
 # get universities by ids
 @universities_bp.route("/ids", methods=["POST"])        
@@ -185,7 +217,7 @@ def get_universities_by_ids_search():
     ids = data.get("ids")
     page = data.get("page", 1)
     per_page = data.get("per_page", 10)
-    sort_by = data.get("sort_by", "name")
+    sort_by = data.get("sort_by", "univ_name")
     sort_order = data.get("sort_order", "asc")
     search = data.get("search", "")
     filters = data.get("filters", {})
@@ -193,18 +225,20 @@ def get_universities_by_ids_search():
         return jsonify({"error": "IDs requis sous forme de liste"}), 400
     if sort_order not in ["asc", "desc"]:
         return jsonify({"error": "sort_order doit être 'asc' ou 'desc'"}), 400
-    query = University.query.filter(University.id.in_(ids))
+    query = University.query.filter(University.id_university.in_(ids))
     if search:
-        query = query.filter(University.name.ilike(f"%{search}%") | University.city.ilike(f"%{search}%"))
+        query = query.filter(contains(University.univ_name, search) | contains(University.city, search))
     if filters:
         for key, value in filters.items():
             if hasattr(University, key):
                 query = query.filter(getattr(University, key).ilike(f"%{value}%"))
+    if sort_by not in University.__table__.columns:
+        return jsonify({"error": f"sort_by invalide : '{sort_by}'"}), 400
     if sort_order == "asc":
         query = query.order_by(getattr(University, sort_by).asc())
     else:
         query = query.order_by(getattr(University, sort_by).desc())
-    universities = query.paginate(page, per_page, error_out=False)
+    universities = query.paginate(page=page, per_page=per_page, error_out=False)
     if not universities.items:
         return jsonify({"error": "Aucune université trouvée pour ces IDs"}), 404
     return jsonify({
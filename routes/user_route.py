@@ -4,6 +4,9 @@ from models.service_model import Service
 from app import db
 import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.auth import invalidate_principal
+from utils.export import EXPORT_FORMATS, stream_query, keyset_query_page, wants_page
+from utils.serializers import USER_PUBLIC_ROW
 
 
 users_bp = Blueprint("users", __name__, url_prefix="/users")
@@ -11,8 +14,17 @@ users_bp = Blueprint("users", __name__, url_prefix="/users")
 # GET all users
 @users_bp.route("/", methods=["GET"])
 def get_users():
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users])
+    # ?limit=&cursor= : page par curseur ; ?format=ndjson|csv : export en flux ; sinon tableau JSON en flux
+    query = USER_PUBLIC_ROW.query()
+    fmt = request.args.get("format", "json")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format invalide : '{fmt}'"}), 400
+    try:
+        if wants_page(request.args):
+            return jsonify(keyset_query_page(query, User.id_user, request.args, USER_PUBLIC_ROW)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return stream_query(query.order_by(User.id_user), fmt, filename="users", serializer=USER_PUBLIC_ROW)
 
 # GET user by ID
 # GET current user profile
@@ -33,6 +45,7 @@ def update_user(user_id):
     for key, value in data.items():
         setattr(user, key, value)
     db.session.commit()
+    invalidate_principal(user_id)
     return jsonify(user.to_dict())
 
 
@@ -0,0 +1,194 @@
+from collections import Counter
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from models import db
+from models.acceptance_rollup_model import AcceptanceRollup, AcceptanceRollupValue
+
+
+KEY_COLUMNS = ("speciality_id", "university_id", "application_year", "bac_type")
+
+# Dimensions exposées par /stats (nom public -> colonne des tables d'agrégats)
+DIMENSIONS = {
+    "speciality": "speciality_id",
+    "university": "university_id",
+    "year": "application_year",
+    "bac_type": "bac_type",
+}
+
+
+def _university_ids(items):
+    return {int(u) for u in (items or []) if str(u).strip().isdigit()}
+
+
+def _contributions(experiences):
+    """Contributions d'expériences approuvées : ({clé: [acc, rej, bac_sum, bac_n, tcf_sum, tcf_n]}, {(clé, métrique, valeur): n})."""
+    groups = {}
+    values = Counter()
+    for exp in experiences:
+        base = (exp.speciality_id, exp.application_year, exp.bac_type or "")
+        accepted = _university_ids(exp.university_accepted_in)
+        for university_id, is_accepted in [(u, True) for u in accepted] + [(u, False) for u in _university_ids(exp.university_rejected_in)]:
+            key = (base[0], university_id, base[1], base[2])
+            group = groups.setdefault(key, [0, 0, 0.0, 0, 0.0, 0])
+            if not is_accepted:
+                group[1] += 1
+                continue
+            group[0] += 1
+            if exp.bac_average is not None:
+                group[2] += exp.bac_average
+                group[3] += 1
+                values[(key, "bac", float(exp.bac_average))] += 1
+            if exp.level_tcf is not None:
+                group[4] += exp.level_tcf
+                group[5] += 1
+                values[(key, "tcf", float(exp.level_tcf))] += 1
+    return groups, values
+
+
+def apply_rollups(experiences, delta):
+    """Ajoute (+1) ou retire (-1) des expériences approuvées des agrégats : deux upserts et deux purges."""
+    groups, values = _contributions(experiences)
+    if not groups:
+        return
+    # Lignes triées par clé : deux approbations concurrentes verrouillent dans le même ordre (pas d'interblocage)
+    stmt = insert(AcceptanceRollup).values([
+        dict(zip(KEY_COLUMNS, key), accepted=g[0] * delta, rejected=g[1] * delta,
+             bac_sum=g[2] * delta, bac_count=g[3] * delta, tcf_sum=g[4] * delta, tcf_count=g[5] * delta)
+        for key, g in sorted(groups.items())
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            column: getattr(AcceptanceRollup, column) + getattr(stmt.excluded, column)
+            for column in ("accepted", "rejected", "bac_sum", "bac_count", "tcf_sum", "tcf_count")
+        },
+    ))
+    if values:
+        stmt = insert(AcceptanceRollupValue).values([
+            dict(zip(KEY_COLUMNS, key), metric=metric, value=value, n=n * delta)
+            for (key, metric, value), n in sorted(values.items())
+        ])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS) + ["metric", "value"],
+            set_={"n": AcceptanceRollupValue.n + stmt.excluded.n},
+        ))
+
+    if delta < 0:
+        touched = list(groups)
+        key = tuple_(*(getattr(AcceptanceRollup, c) for c in KEY_COLUMNS))
+        db.session.query(AcceptanceRollup).filter(
+            key.in_(touched), AcceptanceRollup.accepted <= 0, AcceptanceRollup.rejected <= 0
+        ).delete(synchronize_session=False)
+        key = tuple_(*(getattr(AcceptanceRollupValue, c) for c in KEY_COLUMNS))
+        db.session.query(AcceptanceRollupValue).filter(
+            key.in_(touched), AcceptanceRollupValue.n <= 0
+        ).delete(synchronize_session=False)
+
+
+def rebuild_rollups():
+    """Reconstruction complète depuis experiences (réparation, ou après un import en masse)."""
+    db.session.execute(text("TRUNCATE acceptance_rollup_values, acceptance_rollups"))
+    db.session.execute(text("""
+        INSERT INTO acceptance_rollups (speciality_id, university_id, application_year, bac_type,
+                                        accepted, rejected, bac_sum, bac_count, tcf_sum, tcf_count)
+        SELECT e.speciality_id, o.university_id, e.application_year, coalesce(e.bac_type, ''),
+               count(*) FILTER (WHERE o.accepted),
+               count(*) FILTER (WHERE NOT o.accepted),
+               coalesce(sum(e.bac_average) FILTER (WHERE o.accepted), 0),
+               count(e.bac_average) FILTER (WHERE o.accepted),
+               coalesce(sum(e.level_tcf) FILTER (WHERE o.accepted), 0),
+               count(e.level_tcf) FILTER (WHERE o.accepted)
+        FROM experiences e
+        CROSS JOIN LATERAL (
+            SELECT DISTINCT u AS university_id, true AS accepted FROM unnest(e.university_accepted_in) u
+            UNION ALL
+            SELECT DISTINCT u, false FROM unnest(e.university_rejected_in) u
+        ) o
+        WHERE e.is_validated = 'approved' AND o.university_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """))
+    db.session.execute(text("""
+        INSERT INTO acceptance_rollup_values (speciality_id, university_id, application_year, bac_type, metric, value, n)
+        SELECT e.speciality_id, a.university_id, e.application_year, coalesce(e.bac_type, ''), m.metric, m.value, count(*)
+        FROM experiences e
+        CROSS JOIN LATERAL (SELECT DISTINCT u AS university_id FROM unnest(e.university_accepted_in) u) a
+        CROSS JOIN LATERAL (VALUES ('bac', e.bac_average), ('tcf', e.level_tcf::double precision)) AS m(metric, value)
+        WHERE e.is_validated = 'approved' AND a.university_id IS NOT NULL AND m.value IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """))
+    db.session.commit()
+
+
+def _where(filters):
+    clauses = []
+    params = {}
+    for name, value in filters.items():
+        column = DIMENSIONS[name]
+        clauses.append(f"{column} = :{column}")
+        params[column] = value
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def acceptance_stats(filters, group_by, limit):
+    """Lit uniquement les tables d'agrégats : taux d'acceptation, moyennes et médianes bac/TCF des acceptés.
+
+    `filters` : {dimension: valeur} ; `group_by` : liste de dimensions (clés de DIMENSIONS).
+    """
+    columns = [DIMENSIONS[name] for name in group_by]
+    where, params = _where(filters)
+    select_dims = "".join(f"{column}, " for column in columns)
+    group = ("GROUP BY " + ", ".join(columns)) if columns else ""
+    params["limit"] = limit
+
+    rows = db.session.execute(text(f"""
+        SELECT {select_dims}sum(accepted) AS accepted, sum(rejected) AS rejected,
+               sum(bac_sum) AS bac_sum, sum(bac_count) AS bac_count,
+               sum(tcf_sum) AS tcf_sum, sum(tcf_count) AS tcf_count
+        FROM acceptance_rollups
+        {where}
+        {group}
+        HAVING sum(accepted) + sum(rejected) > 0
+        ORDER BY sum(accepted) + sum(rejected) DESC
+        LIMIT :limit
+    """), params).all()
+    if not rows:
+        return []
+
+    # Médiane exacte depuis la distribution : valeurs de rang floor((n+1)/2) et floor(n/2)+1
+    partition = ", ".join(columns + ["metric"])
+    medians = {}
+    for row in db.session.execute(text(f"""
+        WITH v AS (
+            SELECT {select_dims}metric, value, sum(n) AS n
+            FROM acceptance_rollup_values
+            {where}
+            GROUP BY {select_dims}metric, value
+        ), c AS (
+            SELECT v.*, sum(n) OVER (PARTITION BY {partition} ORDER BY value) AS cum,
+                   sum(n) OVER (PARTITION BY {partition}) AS total
+            FROM v
+        )
+        SELECT {select_dims}metric,
+               (min(value) FILTER (WHERE cum >= floor((total + 1) / 2))
+                + min(value) FILTER (WHERE cum >= floor(total / 2) + 1)) / 2 AS median
+        FROM c
+        GROUP BY {select_dims}metric
+    """), params):
+        medians[(tuple(getattr(row, column) for column in columns), row.metric)] = row.median
+
+    result = []
+    for row in rows:
+        dims = tuple(getattr(row, column) for column in columns)
+        total = row.accepted + row.rejected
+        item = {name: getattr(row, DIMENSIONS[name]) for name in group_by}
+        item.update({
+            "accepted": row.accepted,
+            "rejected": row.rejected,
+            "acceptance_rate": row.accepted / total,
+            "mean_bac_average": row.bac_sum / row.bac_count if row.bac_count else None,
+            "median_bac_average": medians.get((dims, "bac")),
+            "mean_tcf": row.tcf_sum / row.tcf_count if row.tcf_count else None,
+            "median_tcf": medians.get((dims, "tcf")),
+        })
+        result.append(item)
+    return result
@@ -0,0 +1,56 @@
+import datetime
+from flask import current_app
+from sqlalchemy import func
+from models import db
+from models.user_model import User
+from models.experiences_model import Experience
+from utils.cache import TTLCache
+
+
+_STATS_KEY = "all_stats"
+stats_cache = TTLCache(ttl=30)
+
+
+def compute_stats():
+    """Statistiques du tableau de bord admin en deux requêtes agrégées (COUNT ... FILTER (WHERE ...))."""
+    thirty_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+
+    users = db.session.query(
+        func.count(User.id_user).label("total"),
+        func.count(User.id_user).filter(User.isbanned == False).label("active"),
+        func.count(User.id_user).filter(User.subscription == True).label("premium"),
+        func.count(User.id_user).filter(User.created_at >= thirty_days_ago).label("last_30_days"),
+    ).one()
+
+    experiences = db.session.query(
+        func.count(Experience.id_experience).label("total"),
+        func.count(Experience.id_experience).filter(Experience.is_validated == "pending").label("pending"),
+        func.count(Experience.id_experience).filter(Experience.is_validated == "approved").label("approved"),
+        func.count(Experience.id_experience).filter(Experience.is_validated == "rejected").label("rejected"),
+    ).one()
+
+    total_users = users.total
+    total_experiences = experiences.total
+    return {
+        "total_users": total_users,
+        "active_users": users.active,
+        "premium_users": users.premium,
+        "total_experiences": total_experiences,
+        "pending_experiences": experiences.pending,
+        "approved_experiences": experiences.approved,
+        "rejected_experiences": experiences.rejected,
+        "taux_conversion": (users.premium / total_users) * 100 if total_users > 0 else 0,
+        "taux_approbation": (experiences.approved / total_experiences) * 100 if total_experiences > 0 else 0,
+        "banned_users_count": total_users - users.active,
+        "new_users_last_30_days": users.last_30_days,
+        "taux_conversion_last_30_days": (users.last_30_days / total_users) * 100 if total_users > 0 else 0
+    }
+
+
+def get_stats():
+    """Renvoie les statistiques en cache (TTL configurable via ADMIN_STATS_CACHE_TTL)."""
+    return stats_cache.get_or_set(_STATS_KEY, compute_stats, current_app.config.get("ADMIN_STATS_CACHE_TTL"))
+
+
+def invalidate_stats():
+    stats_cache.delete(_STATS_KEY)
@@ -0,0 +1,71 @@
+from collections import namedtuple
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_current_user
+from models import db
+from models.user_model import User
+from utils.cache import TTLCache
+
+
+# Données d'autorisation minimales (jamais un objet ORM : le cache survit à la session)
+Principal = namedtuple("Principal", ["id_user", "role", "isbanned"])
+
+principal_cache = TTLCache(ttl=60, maxsize=10000)
+
+
+def load_principal(user_id):
+    """Rôle et statut de bannissement d'un utilisateur, mis en cache par processus (TTL court)."""
+    user_id = int(user_id)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = db.session.query(User.id_user, User.role, User.isbanned).filter(User.id_user == user_id).first()
+        if row is None:
+            return None
+        principal = Principal(row.id_user, (row.role or "").strip().lower(), bool(row.isbanned))
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id):
+    """À appeler après un bannissement, débannissement, changement de rôle ou suppression."""
+    principal_cache.delete(int(user_id))
+
+
+def role_claims(user):
+    return {"role": (user.role or "").strip().lower()}
+
+
+def init_auth(app, jwt):
+    principal_cache.ttl = app.config.get("AUTH_PRINCIPAL_CACHE_TTL", 60)
+
+    @jwt.user_lookup_loader
+    def _user_lookup(jwt_header, jwt_data):
+        # Un compte banni est refusé sur toutes les routes protégées, sans attendre l'expiration du jeton
+        principal = load_principal(jwt_data["sub"])
+        if principal is None or principal.isbanned:
+            return None
+        return principal
+
+    @jwt.user_lookup_error_loader
+    def _user_lookup_error(jwt_header, jwt_data):
+        return jsonify({"error": "Utilisateur introuvable ou banni"}), 401
+
+
+def admin_required(fn):
+    """jwt_required + rôle admin.
+
+    Le claim « role » du jeton écarte les non-admins sans accès base ; pour un admin,
+    le rôle est revérifié via le cache pour qu'une rétrogradation prenne effet sans
+    attendre l'expiration du jeton.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        claimed_role = get_jwt().get("role")
+        if claimed_role is not None and claimed_role != "admin":
+            return jsonify({"error": "Accès non autorisé"}), 403
+        principal = get_current_user()
+        if not principal or principal.role != "admin":
+            return jsonify({"error": "Accès non autorisé"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
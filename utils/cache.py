@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Petit cache mémoire (par processus) avec expiration et invalidation explicite."""
+
+    def __init__(self, ttl, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            if self.maxsize and len(self._data) >= self.maxsize and key not in self._data:
+                # Éviction de l'entrée la plus ancienne (ordre d'insertion)
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
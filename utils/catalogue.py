@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from flask import Response, request
+from sqlalchemy import text
+from models import db
+from models.university_model import University
+from models.speciality_model import Speciality
+from utils.json_provider import dumps_bytes
+from utils.serializers import UNIVERSITY_ROW, SPECIALITY_ROW
+
+
+class _Entry:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, data):
+        self.body = dumps_bytes(data)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+
+
+class CatalogueCache:
+    """Catalogue universités/spécialités pré-sérialisé en JSON (octets) par processus.
+
+    Invalidé explicitement par les routes d'écriture admin. Chaque processus a sa propre
+    copie : au plus toutes les `check_interval` secondes, une empreinte calculée par la base
+    sur le contenu des deux tables est comparée à celle de la copie, qui est reconstruite si
+    un autre worker a modifié le catalogue (noms, seuils ou compteurs).
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    @staticmethod
+    def _current_fingerprint():
+        # Tables de quelques milliers de lignes au plus : une seule valeur renvoyée par la base
+        return db.session.execute(text("""
+            SELECT (SELECT md5(coalesce(string_agg(u::text, ',' ORDER BY u.id_university), ''))
+                    FROM universities u),
+                   (SELECT md5(coalesce(string_agg(s::text, ',' ORDER BY s.id_speciality), ''))
+                    FROM specialities s)
+        """)).one().tuple()
+
+    def _build(self):
+        # Tuples de colonnes : pas d'objets ORM à instancier pour tout le catalogue
+        univ_dicts = UNIVERSITY_ROW.dump_all(UNIVERSITY_ROW.query().order_by(University.id_university))
+        spec_dicts = SPECIALITY_ROW.dump_all(SPECIALITY_ROW.query().order_by(Speciality.id_speciality))
+
+        by_city = {}
+        for data in univ_dicts:
+            by_city.setdefault(data["city"], []).append(data)
+
+        return {
+            "universities": _Entry(univ_dicts),
+            "university": {data["id_university"]: _Entry(data) for data in univ_dicts},
+            "city": {city: _Entry(items) for city, items in by_city.items()},
+            "specialities": _Entry(spec_dicts),
+        }
+
+    def _reload(self):
+        # Empreinte lue avant les lignes : une écriture intercalée déclenchera une reconstruction
+        self._fingerprint = self._current_fingerprint()
+        self._snapshot = self._build()
+        self._checked_at = time.monotonic()
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._reload()
+            elif time.monotonic() - self._checked_at >= self.check_interval:
+                self._checked_at = time.monotonic()
+                if self._current_fingerprint() != self._fingerprint:
+                    self._reload()
+            return self._snapshot
+
+    def get(self, section, key=None):
+        entries = self.snapshot()[section]
+        return entries if key is None else entries.get(key)
+
+
+def json_response(entry, status=200):
+    """Réponse JSON pré-sérialisée avec ETag ; 304 si le client a déjà cette version."""
+    if entry.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, status=status, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+catalogue_cache = CatalogueCache()
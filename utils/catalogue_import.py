@@ -0,0 +1,273 @@
+from sqlalchemy import literal_column, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from models import db
+from models.speciality_model import Speciality
+from models.university_model import University
+from models.univspec_model import UnivSpec
+from utils.catalogue import catalogue_cache
+from utils.counters import refresh_specialities_nbr
+from utils.grades_import import IMPORT_BATCH_SIZE, MAX_REPORTED_ERRORS, iter_records
+
+
+CATALOGUE_KINDS = {"universities", "specialities"}
+
+# Clés naturelles (cibles des ON CONFLICT) : nom de l'index -> (table, colonnes), par type d'import
+CATALOGUE_INDEXES = {
+    "universities": ("uq_universities_name_city", "universities", ("univ_name", "city")),
+    "specialities": ("uq_specialities_name_university", "specialities", ("speciality_name", "university_id")),
+}
+MAX_REPORTED_DUPLICATES = 20
+
+
+def missing_catalogue_index(kind):
+    """Nom de l'index unique requis par l'import `kind` s'il n'existe pas encore, sinon None."""
+    index_name = CATALOGUE_INDEXES[kind][0]
+    exists = db.session.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": index_name}).scalar()
+    return None if exists else index_name
+
+
+def find_catalogue_duplicates(kind):
+    """Clés naturelles présentes plusieurs fois (empêchent la création de l'index unique) : [{clé..., count}]."""
+    _, table, columns = CATALOGUE_INDEXES[kind]
+    column_list = ", ".join(columns)
+    rows = db.session.execute(text(f"""
+        SELECT {column_list}, count(*) AS count FROM {table}
+        GROUP BY {column_list} HAVING count(*) > 1
+        ORDER BY count(*) DESC, {column_list}
+        LIMIT :limit
+    """), {"limit": MAX_REPORTED_DUPLICATES}).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def install_catalogue_ddl():
+    """Migration explicite (`flask migrate-catalogue`) : crée les index uniques des clés naturelles.
+
+    Un index n'est créé que si sa table est sans doublon ; renvoie {kind: doublons}
+    pour les index non créés (vide si tout est installé), sans lever d'erreur.
+    """
+    blocked = {}
+    for kind, (index_name, table, columns) in CATALOGUE_INDEXES.items():
+        if not missing_catalogue_index(kind):
+            continue
+        duplicates = find_catalogue_duplicates(kind)
+        if duplicates:
+            blocked[kind] = duplicates
+            continue
+        db.session.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)})"))
+    db.session.commit()
+    return blocked
+
+
+def _text_field(record, name, required=True):
+    value = record.get(name)
+    value = str(value).strip() if value is not None else ""
+    if required and not value:
+        raise ValueError(f"Champ '{name}' manquant")
+    return value or None
+
+
+def _number_field(record, name, cast, default, minimum, maximum):
+    value = record.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        value = cast(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"'{name}' invalide : {record.get(name)!r}")
+    if not minimum <= value <= maximum:
+        raise ValueError(f"'{name}' doit être compris entre {minimum} et {maximum}")
+    return value
+
+
+def validate_university(record):
+    """Renvoie (univ_name, city) ou lève ValueError."""
+    return _text_field(record, "univ_name"), _text_field(record, "city")
+
+
+def validate_speciality(record):
+    """Renvoie un dict prêt à insérer (+ 'university_key' si l'université est désignée par nom et ville)."""
+    row = {
+        "speciality_name": _text_field(record, "speciality_name"),
+        "university_id": None,
+        "university_key": None,
+        # Mêmes bornes que les CheckConstraint de Speciality
+        "min_bac_average": _number_field(record, "min_bac_average", float, 10, 0, 20),
+        "min_tcf_score": _number_field(record, "min_tcf_score", int, 300, 300, 699),
+        "min_average": _number_field(record, "min_average", float, 10, 10, 20),
+    }
+    if record.get("university_id") not in (None, ""):
+        try:
+            row["university_id"] = int(record["university_id"])
+        except (ValueError, TypeError):
+            raise ValueError(f"'university_id' invalide : {record['university_id']!r}")
+    elif record.get("univ_name") or record.get("city"):
+        row["university_key"] = validate_university(record)
+    return row
+
+
+def upsert_universities(rows):
+    """INSERT ... ON CONFLICT (univ_name, city) DO NOTHING ; renvoie le nombre de lignes créées."""
+    if not rows:
+        return 0
+    stmt = (
+        insert(University.__table__)
+        .values([{"univ_name": name, "city": city} for name, city in rows])
+        .on_conflict_do_nothing(index_elements=["univ_name", "city"])
+        .returning(University.id_university)
+    )
+    return len(db.session.execute(stmt).all())
+
+
+def upsert_specialities(rows):
+    """INSERT ... ON CONFLICT (speciality_name, university_id) DO UPDATE des seuils ; renvoie [(id, university_id, inséré)].
+
+    xmax = 0 distingue une ligne insérée d'une ligne mise à jour par le ON CONFLICT.
+    """
+    if not rows:
+        return []
+    stmt = insert(Speciality.__table__).values([
+        {key: row[key] for key in ("speciality_name", "university_id", "min_bac_average", "min_tcf_score", "min_average")}
+        for row in rows
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["speciality_name", "university_id"],
+        set_={
+            "min_bac_average": stmt.excluded.min_bac_average,
+            "min_tcf_score": stmt.excluded.min_tcf_score,
+            "min_average": stmt.excluded.min_average,
+        },
+    ).returning(Speciality.id_speciality, Speciality.university_id, literal_column("xmax = 0").label("inserted"))
+    return db.session.execute(stmt).all()
+
+
+def link_univspec(pairs):
+    """Liens univspec (university_id, speciality_id) manquants, puis recalcul de specialities_nbr."""
+    if not pairs:
+        return 0
+    stmt = (
+        insert(UnivSpec)
+        .values([{"university_id": u, "speciality_id": s} for u, s in pairs])
+        .on_conflict_do_nothing()
+        .returning(UnivSpec.c.university_id)
+    )
+    linked = db.session.execute(stmt).scalars().all()
+    refresh_specialities_nbr(set(linked))
+    return len(linked)
+
+
+class CatalogueImport:
+    """Import en flux d'universités ou de spécialités (CSV/NDJSON), ré-exécutable sans doublons.
+
+    Une seule passe : chaque ligne est validée, dédoublonnée sur sa clé naturelle puis
+    upsertée par lots (une transaction par lot). `progress(report)` est appelé après chaque lot.
+    """
+
+    def __init__(self, kind, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        if kind not in CATALOGUE_KINDS:
+            raise ValueError("kind doit être 'universities' ou 'specialities'")
+        self.kind = kind
+        self.batch_size = batch_size
+        self.progress = progress
+        self.seen = set()
+        self.report = {
+            "kind": kind, "lines": 0, "inserted": 0, "existing": 0, "duplicates": 0,
+            "rejected": 0, "links": 0, "batches": 0, "errors": [],
+        }
+
+    def reject(self, line_num, message):
+        self.report["rejected"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line_num, "error": message})
+
+    def run(self, stream, content_type):
+        validate = validate_university if self.kind == "universities" else validate_speciality
+        batch = []
+        try:
+            for line_num, record in iter_records(stream, content_type):
+                self.report["lines"] += 1
+                if isinstance(record, Exception):
+                    self.reject(line_num, str(record))
+                    continue
+                try:
+                    if not isinstance(record, dict):
+                        raise ValueError("Chaque ligne doit être un objet")
+                    row = validate(record)
+                except ValueError as e:
+                    self.reject(line_num, str(e))
+                    continue
+                batch.append((line_num, row))
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+            if batch:
+                self.flush(batch)
+        finally:
+            # Les lots déjà validés sont visibles même si l'import s'interrompt
+            catalogue_cache.invalidate()
+        return self.report
+
+    def _dedupe(self, key):
+        if key in self.seen:
+            self.report["duplicates"] += 1
+            return False
+        self.seen.add(key)
+        return True
+
+    def flush(self, batch):
+        if self.kind == "universities":
+            rows = [row for _, row in batch if self._dedupe(row)]
+            inserted = upsert_universities(rows)
+            self.report["inserted"] += inserted
+            self.report["existing"] += len(rows) - inserted
+        else:
+            self._flush_specialities(batch)
+        db.session.commit()
+        self.report["batches"] += 1
+        if self.progress:
+            self.progress(self.report)
+
+    def _flush_specialities(self, batch):
+        # Universités désignées par (nom, ville) : résolues en une requête par lot
+        keys = {row["university_key"] for _, row in batch if row["university_key"]}
+        ids = {row["university_id"] for _, row in batch if row["university_id"] is not None}
+        by_key = {}
+        if keys:
+            by_key = {
+                (r.univ_name, r.city): r.id_university
+                for r in db.session.query(University.id_university, University.univ_name, University.city)
+                .filter(tuple_(University.univ_name, University.city).in_(keys))
+            }
+        existing_ids = set()
+        if ids:
+            existing_ids = {r.id_university for r in db.session.query(University.id_university).filter(University.id_university.in_(ids))}
+
+        rows = []
+        for line_num, row in batch:
+            if row["university_key"]:
+                row["university_id"] = by_key.get(row["university_key"])
+                if row["university_id"] is None:
+                    self.reject(line_num, "Université {} ({}) introuvable".format(*row["university_key"]))
+                    continue
+            elif row["university_id"] is not None and row["university_id"] not in existing_ids:
+                self.reject(line_num, f"Université {row['university_id']} introuvable")
+                continue
+            if self._dedupe((row["speciality_name"], row["university_id"])):
+                rows.append(row)
+
+        # NULL n'entre pas en conflit dans un index unique : doublons sans université écartés ici
+        orphans = {row["speciality_name"] for row in rows if row["university_id"] is None}
+        if orphans:
+            known = {
+                r.speciality_name for r in db.session.query(Speciality.speciality_name)
+                .filter(Speciality.university_id.is_(None), Speciality.speciality_name.in_(orphans))
+            }
+            self.report["existing"] += sum(1 for row in rows if row["university_id"] is None and row["speciality_name"] in known)
+            rows = [row for row in rows if row["university_id"] is not None or row["speciality_name"] not in known]
+
+        results = upsert_specialities(rows)
+        inserted = sum(1 for result in results if result[2])
+        self.report["inserted"] += inserted
+        self.report["existing"] += len(results) - inserted
+        self.report["links"] += link_univspec([
+            (university_id, speciality_id) for speciality_id, university_id, _ in results if university_id is not None
+        ])
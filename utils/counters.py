@@ -0,0 +1,124 @@
+from collections import Counter
+from sqlalchemy import event, func, text
+from models import db
+from models.speciality_model import Speciality
+from models.university_model import University
+from utils.acceptance_stats import apply_rollups
+
+
+def _accepted_ids(experience):
+    return {int(u) for u in (experience.university_accepted_in or []) if str(u).strip().isdigit()}
+
+
+def apply_acceptance(experience, delta):
+    """Ajoute (+1) ou retire (-1) une expérience approuvée des compteurs, en deux UPDATE ensemblistes."""
+    accepted = _accepted_ids(experience)
+    if accepted:
+        db.session.execute(
+            University.__table__.update()
+            .where(University.id_university.in_(accepted))
+            .values(nbr_candidates_accepted=func.greatest(University.nbr_candidates_accepted + delta, 0))
+        )
+        db.session.execute(
+            Speciality.__table__.update()
+            .where(Speciality.id_speciality == experience.speciality_id)
+            .values(nbr_candidate_accepted_in=func.greatest(Speciality.nbr_candidate_accepted_in + delta, 0))
+        )
+
+
+def on_status_change(experience, previous_status, new_status):
+    """À appeler avant le commit quand is_validated change (new_status=None pour une suppression).
+
+    Met à jour les compteurs dénormalisés et les agrégats de /stats dans la même transaction.
+    """
+    was_approved = previous_status == "approved"
+    is_approved = new_status == "approved"
+    if was_approved and not is_approved:
+        apply_acceptance(experience, -1)
+        apply_rollups([experience], -1)
+    elif is_approved and not was_approved:
+        apply_acceptance(experience, +1)
+        apply_rollups([experience], +1)
+
+
+def apply_acceptance_many(experiences, delta):
+    """Version ensembliste d'apply_acceptance pour un lot d'expériences : deux UPDATE au total."""
+    universities = Counter()
+    specialities = Counter()
+    for experience in experiences:
+        accepted = _accepted_ids(experience)
+        if accepted:
+            universities.update(accepted)
+            specialities[experience.speciality_id] += 1
+    # IDs triés : ordre de verrouillage stable entre transactions concurrentes
+    universities = dict(sorted(universities.items()))
+    specialities = dict(sorted(specialities.items()))
+    if universities:
+        db.session.execute(text("""
+            UPDATE universities u
+            SET nbr_candidates_accepted = greatest(u.nbr_candidates_accepted + d.n * :delta, 0)
+            FROM unnest(CAST(:ids AS integer[]), CAST(:counts AS integer[])) AS d(id, n)
+            WHERE u.id_university = d.id
+        """), {"ids": list(universities), "counts": list(universities.values()), "delta": delta})
+        db.session.execute(text("""
+            UPDATE specialities s
+            SET nbr_candidate_accepted_in = greatest(s.nbr_candidate_accepted_in + d.n * :delta, 0)
+            FROM unnest(CAST(:ids AS integer[]), CAST(:counts AS integer[])) AS d(id, n)
+            WHERE s.id_speciality = d.id
+        """), {"ids": list(specialities), "counts": list(specialities.values()), "delta": delta})
+
+
+def on_status_change_many(experiences, new_status):
+    """Équivalent groupé d'on_status_change ; `experiences` porte encore l'ancien is_validated."""
+    if new_status == "approved":
+        added = [e for e in experiences if e.is_validated != "approved"]
+        apply_acceptance_many(added, +1)
+        apply_rollups(added, +1)
+    else:
+        removed = [e for e in experiences if e.is_validated == "approved"]
+        apply_acceptance_many(removed, -1)
+        apply_rollups(removed, -1)
+
+
+# Liens univspec modifiés via l'ORM : les événements de University.specialities
+# sont aussi déclenchés par le back_populates de Speciality.universities
+@event.listens_for(University.specialities, "append")
+def _speciality_linked(university, speciality, initiator):
+    university.specialities_nbr = (university.specialities_nbr or 0) + 1
+
+
+@event.listens_for(University.specialities, "remove")
+def _speciality_unlinked(university, speciality, initiator):
+    university.specialities_nbr = max((university.specialities_nbr or 0) - 1, 0)
+
+
+def refresh_specialities_nbr(university_ids):
+    """Recalcule specialities_nbr pour des universités dont les liens ont été écrits hors ORM."""
+    if not university_ids:
+        return
+    db.session.execute(text("""
+        UPDATE universities u
+        SET specialities_nbr = (SELECT count(*) FROM univspec us WHERE us.university_id = u.id_university)
+        WHERE u.id_university = ANY(:ids)
+    """), {"ids": list(university_ids)})
+
+
+def recompute_counters():
+    """Réparation : recalcule tous les compteurs depuis experiences et univspec."""
+    db.session.execute(text("""
+        UPDATE universities u SET
+            nbr_candidates_accepted = (
+                SELECT count(*) FROM experiences e
+                WHERE e.is_validated = 'approved' AND e.university_accepted_in @> ARRAY[u.id_university]
+            ),
+            specialities_nbr = (SELECT count(*) FROM univspec us WHERE us.university_id = u.id_university)
+    """))
+    db.session.execute(text("""
+        UPDATE specialities s SET
+            nbr_candidate_accepted_in = (
+                SELECT count(*) FROM experiences e
+                WHERE e.is_validated = 'approved' AND e.speciality_id = s.id_speciality
+                  AND cardinality(coalesce(e.university_accepted_in, '{}')) > 0
+            )
+    """))
+    db.session.commit()
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class PoolMetrics:
+    """Compteurs de checkout du pool (par processus)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts) * 1000 if self.checkouts else 0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente de chaque checkout et compte les timeouts."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options_from_env():
+    """SQLALCHEMY_ENGINE_OPTIONS à partir des variables DB_POOL_* / DB_STATEMENT_TIMEOUT_MS / DB_PGBOUNCER.
+
+    Dimensionnement : (pool_size + max_overflow) x nombre de workers gunicorn doit
+    rester sous max_connections de Postgres (ou la taille du pool PgBouncer).
+    """
+    statement_timeout = _env_int("DB_STATEMENT_TIMEOUT_MS", "0")
+
+    if _env_bool("DB_PGBOUNCER", "false"):
+        # PgBouncer en mode transaction : il gère le pool ; pas de paramètres de démarrage
+        # (statement_timeout à configurer côté rôle Postgres : ALTER ROLE ... SET statement_timeout)
+        return {"poolclass": NullPool, "pool_pre_ping": False}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": _env_int("DB_POOL_SIZE", "5"),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", "10"),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", "30"),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", "1800"),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+        "echo": _env_bool("SQLALCHEMY_ECHO", "false"),
+    }
+    if statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
@@ -1,78 +1,48 @@
-from flask_mail import Message
 from flask import current_app
-from utils.token import generate_token
-from models import db
+from utils.helpers import get_serializer
+from utils.mail_queue import enqueue_email, enqueue_emails
+
+
+VERIFICATION_EMAIL = {
+    "template": "emails/verification.html",
+    "subject": "✔ Vérifiez votre adresse email",
+    "url": "http://127.0.0.1:5000/auth/verify/{token}",
+}
+
+PASSWORD_RESET_EMAIL = {
+    "template": "emails/password_reset.html",
+    "subject": "✔ Changer votre mot de passe",
+    "url": "http://127.0.0.1:5000/auth/forgot-password/{token}",
+}
 
-def send_verification_email(user):
-    from app import mail  # éviter l'import circulaire
 
-    token = generate_token(user.email)
-    confirm_url = f"http://127.0.0.1:5000/auth/verify/{token}"
-    subject = "✔ Vérifiez votre adresse email"
+def render_emails(kind, users):
+    """Rend un email par utilisateur en une passe : template compilé (cache Jinja) et serializer chargés une fois."""
+    template = current_app.jinja_env.get_template(kind["template"])
+    serializer = get_serializer()
+    messages = []
+    for user in users:
+        token = serializer.dumps(user.email, salt='reset-password')
+        html = template.render(first_name=user.first_name, action_url=kind["url"].format(token=token))
+        messages.append((kind["subject"], user.email, html))
+    return messages
 
-    html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
-        <div style="max-width: 600px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0px 2px 8px rgba(0, 0, 0, 0.1);">
-            <h2 style="color: #2c3e50;">Bonjour {user.first_name},</h2>
-            <p style="font-size: 16px; color: #333;">
-                Merci de vous être inscrit sur <strong>PathwayFR</strong> 🎉
-            </p>
-            <p style="font-size: 16px; color: #333;">
-                Veuillez cliquer sur le bouton ci-dessous pour vérifier votre adresse email :
-            </p>
-            <div style="text-align: center; margin: 30px 0;">
-                <a href="{confirm_url}" style="background-color: #3498db; color: #fff; padding: 14px 28px; text-decoration: none; font-weight: bold; border-radius: 5px;">
-                    Vérifier mon adresse
-                </a>
-            </div>
-            <p style="font-size: 14px; color: #999;">
-                Ou copiez-collez ce lien dans votre navigateur si le bouton ne fonctionne pas :<br>
-                <a href="{confirm_url}" style="color: #3498db;">{confirm_url}</a>
-            </p>
-            <hr style="margin-top: 40px;">
-            <p style="font-size: 12px; color: #ccc; text-align: center;">
-                © 2025 PathwayFR. Tous droits réservés.
-            </p>
-        </div>
-    </body>
-    </html>
-    """
 
-    msg = Message(subject, recipients=[user.email], html=html, sender=current_app.config["MAIL_USERNAME"])
-    mail.send(msg)
+# Les emails sont placés dans l'outbox : l'appelant doit faire le commit de la session
+def send_verification_email(user):
+    subject, recipient, html = render_emails(VERIFICATION_EMAIL, [user])[0]
+    return enqueue_email(subject, recipient, html, sender=current_app.config["MAIL_USERNAME"])
+
 
 def send_password_reset_email(user):
-    from app import mail
-    token = generate_token(user.email)
-    reset_url = f"http://127.0.0.1:5000/auth/forgot-password/{token}"
-    subject = "✔ Changer votre mot de passe"
+    subject, recipient, html = render_emails(PASSWORD_RESET_EMAIL, [user])[0]
+    return enqueue_email(subject, recipient, html, sender=current_app.config["MAIL_USERNAME"])
+
+
+# Envois groupés (campagnes de re-vérification, vagues de réinitialisation)
+def send_verification_emails(users):
+    return enqueue_emails(render_emails(VERIFICATION_EMAIL, users), sender=current_app.config["MAIL_USERNAME"])
 
-    html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
-        <div style="max-width: 600px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0px 2px 8px rgba(0, 0, 0, 0.1);">
-            <h2 style="color: #2c3e50;">Bonjour {user.first_name},</h2>
-            <p style="font-size: 16px; color: #333;">
-                Veuillez cliquer sur le bouton ci-dessous pour changer votre mot de passe :
-            </p>
-            <div style="text-align: center; margin: 30px 0;">
-                <a href="{reset_url}" style="background-color: #3498db; color: #fff; padding: 14px 28px; text-decoration: none; font-weight: bold; border-radius: 5px;">
-                    Changer mon mot de passe
-                </a>
-            </div>
-            <p style="font-size: 14px; color: #999;">
-                Ou copiez-collez ce lien dans votre navigateur si le bouton ne fonctionne pas :<br>
-                <a href="{reset_url}" style="color: #3498db;">{reset_url}</a>
-            </p>
-            <hr style="margin-top: 40px;">
-            <p style="font-size: 12px; color: #ccc; text-align: center;">
-                © 2025 PathwayFR. Tous droits réservés.
-            </p>
-        </div>
-    </body>
-    </html>
-    """
 
-    msg = Message(subject, recipients=[user.email], html=html, sender=current_app.config["MAIL_USERNAME"])
-    mail.send(msg)
+def send_password_reset_emails(users):
+    return enqueue_emails(render_emails(PASSWORD_RESET_EMAIL, users), sender=current_app.config["MAIL_USERNAME"])
@@ -0,0 +1,52 @@
+from sqlalchemy import exists, text
+from models import db
+from models.experience_average_model import ExperienceAverage
+from models.experiences_model import Experience
+
+
+REPEAT_SUFFIX = "_repeat"
+
+
+def average_rows(avg_dict):
+    """{"L3": 12.5, "L3_repeat": 11.0, "M1": None} -> [ExperienceAverage(...)] (valeurs nulles ignorées)."""
+    rows = []
+    for key, value in (avg_dict or {}).items():
+        if value is None:
+            continue
+        is_repeat = key.endswith(REPEAT_SUFFIX)
+        level = key[:-len(REPEAT_SUFFIX)] if is_repeat else key
+        rows.append(ExperienceAverage(level=level, is_repeat=is_repeat, average=float(value)))
+    return rows
+
+
+def average_in_range(level, minimum=None, maximum=None, is_repeat=False):
+    """Filtre EXISTS sur la table typée, servi par l'index (level, is_repeat, average)."""
+    condition = [
+        ExperienceAverage.experience_id == Experience.id_experience,
+        ExperienceAverage.level == level,
+        ExperienceAverage.is_repeat == is_repeat,
+    ]
+    if minimum is not None:
+        condition.append(ExperienceAverage.average >= minimum)
+    if maximum is not None:
+        condition.append(ExperienceAverage.average <= maximum)
+    return exists().where(*condition)
+
+
+def backfill_experience_averages():
+    """Migration des lignes existantes : JSONB average_each_year -> experience_averages (idempotent)."""
+    result = db.session.execute(text(r"""
+        INSERT INTO experience_averages (experience_id, level, is_repeat, average)
+        SELECT e.id_experience,
+               regexp_replace(kv.key, '_repeat$', ''),
+               kv.key LIKE '%\_repeat',
+               kv.value::double precision
+        FROM experiences e
+        CROSS JOIN LATERAL jsonb_each_text(e.average_each_year) AS kv
+        WHERE e.average_each_year IS NOT NULL
+          AND jsonb_typeof(e.average_each_year) = 'object'
+          AND kv.value ~ '^-?[0-9]+(\.[0-9]+)?$'
+        ON CONFLICT DO NOTHING
+    """))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,218 @@
+from sqlalchemy import select, tuple_
+from models import db
+from models.experiences_model import Experience
+from models.experience_university_model import experience_university
+from models.university_model import University
+from models.speciality_model import Speciality
+from utils.pagination import decode_cursor, page_response
+from utils.experience_averages import average_in_range
+from utils.serializers import RowSerializer
+
+
+# dictionnaire de correspondance
+YEAR_MAPPING = {
+    1: "L1",
+    2: "L2",
+    3: "L3",
+    4: "M1",
+    5: "M2"
+}
+
+
+def _parse_university_id(item):
+    # Les tableaux peuvent contenir des IDs ou des noms
+    try:
+        return int(item)
+    except (ValueError, TypeError):
+        return None
+
+
+def collect_university_ids(experiences):
+    """Rassemble tous les IDs d'universités acceptées/refusées de l'ensemble des expériences."""
+    ids = set()
+    for exp in experiences:
+        for items in (exp.university_accepted_in, exp.university_rejected_in):
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                univ_id = _parse_university_id(item)
+                if univ_id is not None:
+                    ids.add(univ_id)
+    return ids
+
+
+def fetch_universities(ids):
+    """Récupère les universités en une seule requête IN et renvoie {id: "nom (ville)"}."""
+    if not ids:
+        return {}
+    rows = (
+        db.session.query(University.id_university, University.univ_name, University.city)
+        .filter(University.id_university.in_(ids))
+    )
+    return {row.id_university: f"{row.univ_name} ({row.city})" for row in rows}
+
+
+def _format_universities(items, lookup):
+    labels = []
+    if not isinstance(items, list):
+        return labels
+    for item in items:
+        if not item or not str(item).strip():
+            continue
+        univ_id = _parse_university_id(item)
+        if univ_id is None:
+            # Si ce n'est pas un ID, traiter comme un nom
+            labels.append(str(item).strip())
+            continue
+        labels.append(lookup.get(univ_id, str(item)))
+    return labels
+
+
+def _experience_fields(exp):
+    exp_data = {
+        "id_experience": exp.id_experience,
+        "user_id": exp.user_id,
+        "bac_type": exp.bac_type,
+        "bac_average": exp.bac_average,
+        "comment": exp.comment,
+        "application_year": exp.application_year,
+        "study_year_at_application_time": exp.study_year_at_application_time,
+        "average_each_year": exp.average_each_year or {},
+        "level_tcf": exp.level_tcf,
+        "candidature_year": exp.candidature_year,
+        "speciality_id": exp.speciality_id,
+        "is_validated": exp.is_validated
+    }
+
+    # Transformer candidature_year numérique en label lisible
+    if exp_data.get("candidature_year") in YEAR_MAPPING:
+        exp_data["candidature_year"] = YEAR_MAPPING[exp_data["candidature_year"]]
+
+    return exp_data
+
+
+# Colonnes lues par l'explorer et le détail d'une expérience, sans objets ORM
+EXPERIENCE_ROW = RowSerializer(
+    Experience.id_experience, Experience.user_id, Experience.bac_type, Experience.bac_average,
+    Experience.comment, Experience.application_year, Experience.study_year_at_application_time,
+    Experience.average_each_year, Experience.level_tcf, Experience.candidature_year,
+    Experience.speciality_id, Experience.is_validated,
+    Experience.university_accepted_in, Experience.university_rejected_in,
+)
+
+
+def explorer_query():
+    """Requête de colonnes (expérience + nom de spécialité) ; compatible avec filter_experiences et keyset_page."""
+    return (
+        db.session.query(*EXPERIENCE_ROW.columns, Speciality.speciality_name)
+        .outerjoin(Speciality, Speciality.id_speciality == Experience.speciality_id)
+    )
+
+
+def fetch_targeted_universities(experience_ids):
+    """Universités visées par expérience, en une requête : {experience_id: [dict]}."""
+    if not experience_ids:
+        return {}
+    rows = (
+        db.session.query(experience_university.c.experience_id, University.id_university, University.univ_name, University.city)
+        .join(University, University.id_university == experience_university.c.university_id)
+        .filter(experience_university.c.experience_id.in_(experience_ids))
+    )
+    targeted = {}
+    for row in rows:
+        targeted.setdefault(row.experience_id, []).append(
+            {"id_university": row.id_university, "univ_name": row.univ_name, "city": row.city}
+        )
+    return targeted
+
+
+def resolve_experience_rows(rows):
+    """Sérialise des lignes de explorer_query() : deux requêtes supplémentaires au plus, quelle que soit la page."""
+    lookup = fetch_universities(collect_university_ids(rows))
+    targeted = fetch_targeted_universities([row.id_experience for row in rows])
+    result = []
+    for row in rows:
+        exp_data = _experience_fields(row)
+        exp_data["university_accepted_in"] = _format_universities(row.university_accepted_in, lookup)
+        exp_data["university_rejected_in"] = _format_universities(row.university_rejected_in, lookup)
+        exp_data["speciality"] = (
+            {"id_speciality": row.speciality_id, "speciality_name": row.speciality_name}
+            if row.speciality_name is not None else None
+        )
+        exp_data["universities"] = targeted.get(row.id_experience, [])
+        result.append(exp_data)
+    return result
+
+
+def _int_arg(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"'{name}' doit être un entier")
+
+
+def _float_arg(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"'{name}' doit être un nombre")
+
+
+def filter_experiences(query, args):
+    """Applique les filtres de l'explorer (query string) ; lève ValueError si un paramètre est invalide."""
+    speciality_id = _int_arg(args, "speciality_id")
+    university_id = _int_arg(args, "university_id")
+    application_year = _int_arg(args, "application_year")
+    bac_type = args.get("bac_type")
+    tcf_min = _int_arg(args, "tcf_min")
+    tcf_max = _int_arg(args, "tcf_max")
+    bac_min = _float_arg(args, "bac_min")
+    bac_max = _float_arg(args, "bac_max")
+    avg_level = args.get("avg_level")
+    avg_min = _float_arg(args, "avg_min")
+    avg_max = _float_arg(args, "avg_max")
+
+    if speciality_id is not None:
+        query = query.filter(Experience.speciality_id == speciality_id)
+    if university_id is not None:
+        query = query.filter(Experience.id_experience.in_(
+            select(experience_university.c.experience_id)
+            .where(experience_university.c.university_id == university_id)
+        ))
+    if application_year is not None:
+        query = query.filter(Experience.application_year == application_year)
+    if bac_type:
+        query = query.filter(Experience.bac_type == bac_type)
+    if tcf_min is not None:
+        query = query.filter(Experience.level_tcf >= tcf_min)
+    if tcf_max is not None:
+        query = query.filter(Experience.level_tcf <= tcf_max)
+    if bac_min is not None:
+        query = query.filter(Experience.bac_average >= bac_min)
+    if bac_max is not None:
+        query = query.filter(Experience.bac_average <= bac_max)
+    if avg_level:
+        query = query.filter(average_in_range(avg_level, avg_min, avg_max))
+    elif avg_min is not None or avg_max is not None:
+        raise ValueError("'avg_level' est requis avec 'avg_min'/'avg_max'")
+    return query
+
+
+def keyset_page(query, cursor, limit):
+    """Page triée par (candidature_year, id_experience) décroissants ; coût O(limit) grâce aux index composites."""
+    order_key = tuple_(Experience.candidature_year, Experience.id_experience)
+    after = decode_cursor(cursor, 2, (int, int))
+    if after is not None:
+        query = query.filter(order_key < tuple_(*after))
+    rows = (
+        query.order_by(Experience.candidature_year.desc(), Experience.id_experience.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    return page_response(rows, limit, lambda exp: (exp.candidature_year, exp.id_experience))
@@ -0,0 +1,79 @@
+import csv
+import datetime
+import io
+from flask import Response, stream_with_context
+from utils.json_provider import dumps_bytes
+from utils.pagination import decode_cursor, page_response, parse_limit
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = {"json", "ndjson", "csv"}
+
+
+def row_to_dict(row):
+    """Row SQLAlchemy -> dict JSON-compatible (dates en isoformat, comme les to_dict des modèles)."""
+    data = row._asdict()
+    for key, value in data.items():
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            data[key] = value.isoformat()
+    return data
+
+
+def _dumps(data):
+    return dumps_bytes(data).decode("utf-8")
+
+
+def _generate(rows, fmt, columns, dump):
+    if fmt == "ndjson":
+        for row in rows:
+            yield _dumps(dump(row)) + "\n"
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        # Tableau JSON émis élément par élément (même format que jsonify(list))
+        yield "["
+        first = True
+        for row in rows:
+            yield ("" if first else ",") + _dumps(dump(row))
+            first = False
+        yield "]"
+
+
+def stream_query(query, fmt="json", filename="export", chunk_size=EXPORT_CHUNK_SIZE, serializer=None):
+    """Réponse Flask en flux : lecture par blocs (yield_per, curseur serveur), mémoire constante.
+
+    `serializer` (RowSerializer) évite l'inspection des valeurs ligne par ligne de row_to_dict.
+    """
+    columns = [column["name"] for column in query.column_descriptions]
+    rows = query.yield_per(chunk_size)
+    dump = serializer.dump if serializer is not None else row_to_dict
+    mimetypes = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+    response = Response(stream_with_context(_generate(rows, fmt, columns, dump)), mimetype=mimetypes[fmt])
+    if fmt != "json":
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}.{fmt}"
+    return response
+
+
+def keyset_query_page(query, key_column, args, serializer=None):
+    """Page par curseur sur une clé entière croissante (?limit=&cursor=) : {items, next_cursor, limit}."""
+    limit = parse_limit(args.get("limit"))
+    after = decode_cursor(args.get("cursor"), 1, (int,))
+    if after is not None:
+        query = query.filter(key_column > after[0])
+    rows = query.order_by(key_column.asc()).limit(limit + 1).all()
+    rows, next_cursor = page_response(rows, limit, lambda row: (getattr(row, key_column.key),))
+    dump = serializer.dump if serializer is not None else row_to_dict
+    return {"items": [dump(row) for row in rows], "next_cursor": next_cursor, "limit": limit}
+
+
+def wants_page(args):
+    return "limit" in args or "cursor" in args
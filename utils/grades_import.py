@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from sqlalchemy.dialects.postgresql import insert
+from models import db
+from models.grades_model import Grade
+from models.user_model import User
+
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def validate_grade(grade):
+    """Renvoie (level, average) ou lève ValueError avec un message lisible."""
+    if not isinstance(grade, dict):
+        raise ValueError(f"Données invalides pour {grade}")
+    level = grade.get("level")
+    average = grade.get("average")
+    if isinstance(average, str):
+        try:
+            average = float(average)
+        except ValueError:
+            pass
+    if not level or isinstance(average, bool) or not isinstance(average, (int, float)):
+        raise ValueError(f"Données invalides pour {grade}")
+    if not 0 <= average <= 20:
+        raise ValueError(f"La moyenne doit être comprise entre 0 et 20 pour {grade}")
+    return str(level).strip(), float(average)
+
+
+def upsert_grades(rows):
+    """INSERT ... ON CONFLICT (user_id, level) DO UPDATE en une seule requête.
+
+    `rows` : itérable de (user_id, level, average) ; en cas de doublon, la dernière valeur gagne.
+    """
+    values = {(user_id, level): average for user_id, level, average in rows}
+    if not values:
+        return 0
+    stmt = insert(Grade.__table__).values([
+        {"user_id": user_id, "level": level, "average": average}
+        for (user_id, level), average in values.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_user_level",
+        set_={"average": stmt.excluded.average},
+    )
+    db.session.execute(stmt)
+    return len(values)
+
+
+def iter_records(stream, content_type):
+    """Lit le corps de la requête ligne par ligne (NDJSON ou CSV) : (numéro de ligne, dict ou erreur)."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if "csv" in (content_type or ""):
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_num, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, ValueError(f"JSON invalide : {e}")
+
+
+def import_grades(stream, content_type, batch_size=IMPORT_BATCH_SIZE):
+    """Import admin en flux : valide chaque ligne, vérifie les utilisateurs et upsert par lots (mémoire constante)."""
+    report = {"imported": 0, "rejected": 0, "batches": 0, "errors": []}
+
+    def reject(line_num, message):
+        report["rejected"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_num, "error": message})
+
+    def flush(batch):
+        user_ids = {user_id for _, user_id, _, _ in batch}
+        existing = {row[0] for row in db.session.query(User.id_user).filter(User.id_user.in_(user_ids))}
+        rows = []
+        for line_num, user_id, level, average in batch:
+            if user_id in existing:
+                rows.append((user_id, level, average))
+            else:
+                reject(line_num, f"Utilisateur {user_id} introuvable")
+        report["imported"] += upsert_grades(rows)
+        db.session.commit()
+        report["batches"] += 1
+
+    batch = []
+    for line_num, record in iter_records(stream, content_type):
+        if isinstance(record, Exception):
+            reject(line_num, str(record))
+            continue
+        try:
+            user_id = int(record.get("user_id")) if isinstance(record, dict) else None
+            if user_id is None:
+                raise ValueError("Champ 'user_id' manquant")
+            level, average = validate_grade(record)
+        except (ValueError, TypeError) as e:
+            reject(line_num, str(e))
+            continue
+        batch.append((line_num, user_id, level, average))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return report
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer
 from flask import current_app
@@ -6,5 +7,10 @@ def hash_password(password):
 
 def verify_password(password, hashed):
     return check_password_hash(hashed, password)
+@lru_cache(maxsize=4)
+def _serializer_for(secret_key):
+    return URLSafeTimedSerializer(secret_key)
+
 def get_serializer():
-    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
\ No newline at end of file
+    # Un serializer par clé secrète, réutilisé entre les appels
+    return _serializer_for(current_app.config['SECRET_KEY'])
@@ -0,0 +1,56 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : repli sur le module json standard
+    orjson = None
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=DefaultJSONProvider.default).encode("utf-8")
+
+
+def _orjson_dumps(obj, sort_keys=False, indent=None):
+    # Datetimes confiés à DefaultJSONProvider.default : même format que jsonify avant orjson
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        # orjson n'indente qu'à deux espaces, quelle que soit la valeur demandée
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+
+
+def dumps_bytes(obj):
+    """Sérialise en JSON compact (octets UTF-8), via orjson s'il est installé."""
+    return _orjson_dumps(obj) if orjson is not None else _stdlib_dumps(obj)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Fournisseur JSON de Flask (jsonify, request.get_json) basé sur orjson.
+
+    Respecte sort_keys et compact/indent comme DefaultJSONProvider ; les autres
+    arguments de json.dumps sont ignorés.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return _orjson_dumps(obj, kwargs.get("sort_keys", self.sort_keys), kwargs.get("indent")).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Même règle que DefaultJSONProvider : indenté en mode debug sauf si compact est forcé
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        # Octets envoyés tels quels : pas de ré-encodage str -> bytes
+        return self._app.response_class(_orjson_dumps(obj, self.sort_keys, indent), mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Remplace le fournisseur JSON de l'application par orjson (JSON_PROVIDER=orjson|default)."""
+    if app.config.get("JSON_PROVIDER") != "orjson" or orjson is None:
+        return
+    app.json_provider_class = OrjsonProvider
+    app.json = OrjsonProvider(app)
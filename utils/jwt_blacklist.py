@@ -1,2 +1,98 @@
 # jwt_blacklist.py
+import datetime
+from sqlalchemy.dialects.postgresql import insert
+from models import db
+from models.revoked_token_model import RevokedToken
+from utils.cache import TTLCache
+
+# Backend par défaut (tests, développement) : ensemble en mémoire, propre au processus
 blacklisted_tokens = set()
+
+
+def _expires_at(jwt_payload):
+    exp = jwt_payload.get("exp")
+    return datetime.datetime.utcfromtimestamp(exp) if exp else None
+
+
+class MemoryRevocationStore:
+    def revoke(self, jwt_payload):
+        blacklisted_tokens.add(jwt_payload["jti"])
+
+    def is_revoked(self, jwt_payload):
+        return jwt_payload["jti"] in blacklisted_tokens
+
+    def purge_expired(self):
+        return 0
+
+
+class DatabaseRevocationStore:
+    """Révocations partagées entre workers via la table revoked_tokens.
+
+    Chaque vérification passe d'abord par un cache mémoire borné (LRU approché) ; en cas
+    d'absence, une lecture ponctuelle sur la clé primaire tranche. Un jti révoqué le reste
+    jusqu'à l'expiration du jeton ; un jti absent est mémorisé `miss_ttl` secondes, ce qui
+    borne le délai avant qu'une révocation faite sur un autre worker soit visible. La purge
+    de la table se fait hors requête (commande `flask purge-revoked-tokens`, à planifier).
+    """
+
+    def __init__(self, miss_ttl=5, maxsize=10000):
+        self.miss_ttl = miss_ttl
+        self._cache = TTLCache(ttl=miss_ttl, maxsize=maxsize)
+
+    def _remember_revoked(self, jti, expires_at):
+        # Inutile de garder l'entrée au-delà de l'expiration : le jeton est alors refusé en amont
+        ttl = (expires_at - datetime.datetime.utcnow()).total_seconds() if expires_at else 86400
+        if ttl > 0:
+            self._cache.set(jti, True, ttl=ttl)
+
+    def revoke(self, jwt_payload):
+        jti = jwt_payload["jti"]
+        expires_at = _expires_at(jwt_payload)
+        db.session.execute(
+            insert(RevokedToken.__table__)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=["jti"])
+        )
+        db.session.commit()
+        self._remember_revoked(jti, expires_at)
+
+    def is_revoked(self, jwt_payload):
+        jti = jwt_payload["jti"]
+        revoked = self._cache.get(jti)
+        if revoked is not None:
+            return revoked
+        revoked = db.session.execute(
+            db.select(db.literal(1)).where(RevokedToken.jti == jti)
+        ).scalar() is not None
+        if revoked:
+            self._remember_revoked(jti, _expires_at(jwt_payload))
+        else:
+            self._cache.set(jti, False)
+        return revoked
+
+    def purge_expired(self):
+        """Supprime les révocations de jetons expirés (les entrées en cache expirent d'elles-mêmes)."""
+        utcnow = datetime.datetime.utcnow()
+        deleted = RevokedToken.query.filter(RevokedToken.expires_at < utcnow).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+
+def init_revocation_store(app):
+    backend = app.config.get("JWT_REVOCATION_BACKEND", "memory")
+    if backend == "database":
+        store = DatabaseRevocationStore(
+            miss_ttl=app.config.get("JWT_REVOCATION_MISS_TTL", 5),
+            maxsize=app.config.get("JWT_REVOCATION_CACHE_SIZE", 10000),
+        )
+    elif backend == "memory":
+        store = MemoryRevocationStore()
+    else:
+        raise ValueError(f"JWT_REVOCATION_BACKEND inconnu : {backend}")
+    app.extensions["jwt_revocation"] = store
+    return store
+
+
+def get_revocation_store():
+    from flask import current_app
+    return current_app.extensions["jwt_revocation"]
@@ -0,0 +1,157 @@
+import datetime
+import threading
+from flask_mail import Message
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.outbox_email_model import OutboxEmail
+
+
+def enqueue_email(subject, recipient, html, sender=None):
+    """Ajoute un email à l'outbox dans la transaction courante (envoyé après le commit par le worker)."""
+    email = OutboxEmail(recipient=recipient, subject=subject, html=html, sender=sender)
+    db.session.add(email)
+    db.session.info["outbox_pending"] = True
+    return email
+
+
+def enqueue_emails(messages, sender=None):
+    """Ajoute plusieurs emails [(subject, recipient, html)] à l'outbox en une insertion groupée."""
+    emails = [
+        OutboxEmail(recipient=recipient, subject=subject, html=html, sender=sender)
+        for subject, recipient, html in messages
+    ]
+    db.session.add_all(emails)
+    db.session.info["outbox_pending"] = True
+    return emails
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker_after_commit(session):
+    # Réveille les workers seulement une fois la ligne visible en base
+    if session.info.pop("outbox_pending", False):
+        mail_worker.notify()
+
+
+def _backoff(attempts, base_delay):
+    # 30 s, 60 s, 120 s, ... plafonné à une heure
+    return datetime.timedelta(seconds=min(base_delay * (2 ** (attempts - 1)), 3600))
+
+
+def drain_once(mail, batch_size=50, max_attempts=5, base_delay=30):
+    """Envoie un lot d'emails en attente sur une seule connexion SMTP ; renvoie le nombre traité.
+
+    Les lignes sont verrouillées avec SKIP LOCKED : plusieurs workers (threads ou
+    processus) peuvent vider la file en parallèle sans double envoi.
+    """
+    emails = (
+        OutboxEmail.query
+        .filter(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= db.func.now())
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id_email)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not emails:
+        db.session.rollback()
+        return 0
+
+    # Horodatages calculés par PostgreSQL (now()), comme le filtre ci-dessus et le server_default
+    now = db.func.now()
+    # Emails déjà traités (envoyés ou échec enregistré) avant une éventuelle erreur de connexion
+    handled = set()
+    try:
+        with mail.connect() as conn:
+            for email in emails:
+                try:
+                    conn.send(Message(email.subject, recipients=[email.recipient], html=email.html, sender=email.sender))
+                    email.status = "sent"
+                    email.sent_at = now
+                except Exception as e:
+                    _record_failure(email, e, now, max_attempts, base_delay)
+                handled.add(email.id_email)
+    except Exception as e:
+        # Connexion au relais impossible ou perdue : le reste du lot est replanifié
+        for email in emails:
+            if email.id_email not in handled:
+                _record_failure(email, e, now, max_attempts, base_delay)
+    db.session.commit()
+    return len(emails)
+
+
+def _record_failure(email, error, now, max_attempts, base_delay):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = now + _backoff(email.attempts, base_delay)
+
+
+class MailWorker:
+    """Pool de threads qui vide l'outbox en arrière-plan."""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self, app, mail):
+        with self._lock:
+            if self._threads:
+                return
+            config = app.config
+            for i in range(config.get("MAIL_QUEUE_WORKERS", 2)):
+                thread = threading.Thread(target=self._run, args=(app, mail), name=f"mail-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def init_app(self, app, mail):
+        """Démarre les threads à la première requête servie, donc dans chaque worker après le fork.
+
+        Rien n'est lancé à l'import de l'application : commandes CLI, scripts et
+        gunicorn --preload ne démarrent pas de threads dans le processus parent.
+        """
+        @app.before_request
+        def _start_mail_worker():
+            if not self._threads:
+                self.start(app, mail)
+
+    def wait(self):
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._stop.clear()
+
+    def _run(self, app, mail):
+        config = app.config
+        while not self._stop.is_set():
+            sent = 0
+            with app.app_context():
+                try:
+                    sent = drain_once(
+                        mail,
+                        batch_size=config.get("MAIL_QUEUE_BATCH_SIZE", 50),
+                        max_attempts=config.get("MAIL_QUEUE_MAX_ATTEMPTS", 5),
+                        base_delay=config.get("MAIL_QUEUE_RETRY_DELAY", 30),
+                    )
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.exception("Erreur du worker d'emails : %s", e)
+            if not sent:
+                # File vide : on attend un nouvel email ou l'intervalle de scrutation
+                self._wakeup.wait(config.get("MAIL_QUEUE_POLL_INTERVAL", 5))
+                self._wakeup.clear()
+
+
+mail_worker = MailWorker()
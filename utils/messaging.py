@@ -0,0 +1,145 @@
+import json
+import queue
+import select
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from models import db
+
+
+NOTIFY_CHANNEL = "messagerie"
+# Limite de NOTIFY Postgres : 8000 octets par charge utile
+MAX_NOTIFY_PAYLOAD = 7500
+# Reconnexion du listener : 1 s, 2 s, 4 s, ... plafonné à une minute
+LISTEN_RETRY_DELAY = 1
+LISTEN_MAX_RETRY_DELAY = 60
+
+
+class MessageHub:
+    """Diffusion des événements de messagerie vers les flux SSE ouverts, par utilisateur.
+
+    backend "memory" : diffusion dans le processus courant uniquement (un seul worker).
+    backend "postgres" : NOTIFY envoyé dans la transaction, chaque worker relaie via LISTEN.
+    """
+
+    def __init__(self, backend="memory", queue_size=100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        self.backend = app.config.get("MESSAGING_BACKEND", "memory")
+        self.queue_size = app.config.get("MESSAGING_QUEUE_SIZE", 100)
+
+    def subscribe(self, user_id):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(q)
+        if self.backend == "postgres":
+            self._ensure_listener()
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues:
+                queues.discard(q)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, user_id, event):
+        with self._lock:
+            queues = list(self._subscribers.get(user_id, ()))
+        for q in queues:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Client trop lent : l'événement est perdu, l'historique reste consultable
+                pass
+
+    def publish(self, user_id, event):
+        """À appeler avant le commit : en mode postgres, la notification part avec la transaction."""
+        if self.backend == "postgres":
+            payload = json.dumps({"user_id": user_id, "event": event}, default=str)
+            if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                event = {"type": event["type"], "data": {"id_message": event["data"].get("id_message")}}
+                payload = json.dumps({"user_id": user_id, "event": event}, default=str)
+            db.session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload})
+        else:
+            db.session.info.setdefault("message_events", []).append((user_id, event))
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="messaging-listener", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        with self._app.app_context():
+            engine = db.engine
+        delay = LISTEN_RETRY_DELAY
+        while True:
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                connection.dbapi_connection.autocommit = True
+                cursor = connection.cursor()
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                raw = connection.dbapi_connection
+                delay = LISTEN_RETRY_DELAY
+                while True:
+                    if select.select([raw], [], [], 30) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        notification = raw.notifies.pop(0)
+                        message = json.loads(notification.payload)
+                        self.dispatch(message["user_id"], message["event"])
+            except Exception as e:
+                self._app.logger.exception("Listener de messagerie interrompu (reconnexion dans %s s) : %s", delay, e)
+            finally:
+                if connection is not None:
+                    connection.close()
+            # Base indisponible : on espace les tentatives au lieu de boucler à pleine vitesse
+            time.sleep(delay)
+            delay = min(delay * 2, LISTEN_MAX_RETRY_DELAY)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_memory_events(session):
+    for user_id, hub_event in session.info.pop("message_events", []):
+        message_hub.dispatch(user_id, hub_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_memory_events(session):
+    session.info.pop("message_events", None)
+
+
+def sse_stream(user_id, heartbeat=15):
+    """Générateur Server-Sent Events ; n'utilise pas la session SQLAlchemy."""
+    q = message_hub.subscribe(user_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = q.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False, default=str)}\n\n"
+    finally:
+        message_hub.unsubscribe(user_id, q)
+
+
+message_hub = MessageHub()
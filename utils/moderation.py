@@ -0,0 +1,217 @@
+import datetime
+from sqlalchemy import any_, bindparam, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from models import db
+from models.experiences_model import Experience
+from models.experience_university_model import experience_university
+from models.moderation_claim_model import ModerationClaim
+from models.speciality_model import Speciality
+from models.university_model import University
+from models.user_model import User
+from utils.admin_stats import invalidate_stats
+from utils.auth import invalidate_principal
+from utils.catalogue import catalogue_cache
+from utils.counters import on_status_change_many
+from utils.experience_resolver import filter_experiences
+from utils.simulator import simulator_index
+
+
+BULK_MAX_IDS = 5000
+EXPERIENCE_STATUSES = {"pending", "approved", "rejected"}
+
+
+def _any_id(column, ids):
+    # column = ANY(:ids) : un seul paramètre tableau, quel que soit le nombre d'IDs
+    return column == any_(bindparam("ids", list(ids), type_=ARRAY(db.Integer)))
+
+
+def parse_ids(values, field="ids"):
+    """Liste d'IDs entiers, dédoublonnée dans l'ordre ; lève ValueError si invalide."""
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"'{field}' doit être une liste non vide d'entiers")
+    if len(values) > BULK_MAX_IDS:
+        raise ValueError(f"{BULK_MAX_IDS} IDs au maximum par requête")
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"'{field}' doit être une liste non vide d'entiers")
+        ids.append(value)
+    return list(dict.fromkeys(ids))
+
+
+def select_experience_ids(criteria, limit=BULK_MAX_IDS):
+    """IDs correspondant à un filtre : mêmes paramètres que l'explorer, plus status (défaut pending) et before_id.
+
+    before_id sert de borne « créées avant » : les IDs sont attribués dans l'ordre de création.
+    """
+    if not isinstance(criteria, dict):
+        raise ValueError("'filter' doit être un objet")
+    status = criteria.get("status", "pending")
+    if status not in EXPERIENCE_STATUSES:
+        raise ValueError("status doit être 'pending', 'approved' ou 'rejected'")
+    query = filter_experiences(
+        db.session.query(Experience.id_experience).filter(Experience.is_validated == status),
+        criteria,
+    )
+    before_id = criteria.get("before_id")
+    if before_id is not None:
+        if isinstance(before_id, bool) or not isinstance(before_id, int):
+            raise ValueError("'before_id' doit être un entier")
+        query = query.filter(Experience.id_experience < before_id)
+    rows = query.order_by(Experience.id_experience).limit(limit + 1).all()
+    ids = [row.id_experience for row in rows]
+    return ids[:limit], len(ids) > limit
+
+
+def moderate_experiences(ids, new_status):
+    """Change le statut d'un lot d'expériences en une transaction ; renvoie {id: résultat}.
+
+    Les lignes sont verrouillées (FOR UPDATE) pour que deux modérations concurrentes
+    ne comptent pas deux fois la même transition dans les compteurs.
+    """
+    rows = (
+        db.session.query(
+            Experience.id_experience, Experience.is_validated, Experience.speciality_id,
+            Experience.application_year, Experience.bac_type, Experience.bac_average, Experience.level_tcf,
+            Experience.university_accepted_in, Experience.university_rejected_in,
+        )
+        .filter(_any_id(Experience.id_experience, ids))
+        .with_for_update()
+        .all()
+    )
+    changed = [row for row in rows if row.is_validated != new_status]
+    outcomes = {experience_id: "not_found" for experience_id in ids}
+    outcomes.update({row.id_experience: "unchanged" for row in rows})
+
+    if changed:
+        changed_ids = [row.id_experience for row in changed]
+        on_status_change_many(changed, new_status)
+        db.session.execute(
+            Experience.__table__.update()
+            .where(_any_id(Experience.id_experience, changed_ids))
+            .values(is_validated=new_status)
+        )
+        outcomes.update({experience_id: new_status for experience_id in changed_ids})
+        release_claims(changed_ids)
+    db.session.commit()
+
+    if changed:
+        simulator_index.refresh(changed_ids)
+        invalidate_stats()
+        # nbr_candidates_accepted / nbr_candidate_accepted_in exposés par le catalogue
+        catalogue_cache.invalidate()
+    return outcomes
+
+
+def set_users_banned(ids, banned, acting_user_id=None):
+    """Bannit / débannit un lot d'utilisateurs avec un seul UPDATE ; renvoie {id: résultat}."""
+    existing = {
+        row.id_user
+        for row in db.session.query(User.id_user).filter(_any_id(User.id_user, ids))
+    }
+    outcomes = {user_id: ("unchanged" if user_id in existing else "not_found") for user_id in ids}
+    targets = [user_id for user_id in existing if user_id != acting_user_id]
+    if acting_user_id in existing:
+        outcomes[acting_user_id] = "forbidden"
+
+    changed = []
+    if targets:
+        changed = db.session.execute(
+            User.__table__.update()
+            .where(_any_id(User.id_user, targets), User.isbanned.isnot(banned))
+            .values(isbanned=banned)
+            .returning(User.id_user)
+        ).scalars().all()
+    db.session.commit()
+
+    status = "banned" if banned else "unbanned"
+    for user_id in changed:
+        outcomes[user_id] = status
+        invalidate_principal(user_id)
+    if changed:
+        invalidate_stats()
+    return outcomes
+
+
+def outcome_response(outcomes):
+    """Corps de réponse : résultat par ID (dans l'ordre de la requête) + totaux par résultat."""
+    summary = {}
+    for status in outcomes.values():
+        summary[status] = summary.get(status, 0) + 1
+    return {
+        "results": [{"id": item_id, "status": status} for item_id, status in outcomes.items()],
+        "summary": summary,
+    }
+
+
+def queue_query():
+    """File de modération en une requête : auteur, spécialité, universités visées et réservation éventuelle."""
+    university_names = (
+        select(func.array_agg(University.univ_name))
+        .select_from(experience_university.join(University, University.id_university == experience_university.c.university_id))
+        .where(experience_university.c.experience_id == Experience.id_experience)
+        .scalar_subquery()
+        .label("universities")
+    )
+    return (
+        db.session.query(
+            Experience.id_experience, Experience.user_id, User.first_name, User.last_name,
+            Experience.candidature_year, Experience.application_year, Experience.comment,
+            Experience.speciality_id, Speciality.speciality_name, university_names,
+            ModerationClaim.moderator_id.label("claimed_by"), ModerationClaim.claimed_at,
+        )
+        .outerjoin(User, User.id_user == Experience.user_id)
+        .outerjoin(Speciality, Speciality.id_speciality == Experience.speciality_id)
+        .outerjoin(ModerationClaim, ModerationClaim.experience_id == Experience.id_experience)
+        .filter(Experience.is_validated == "pending")
+    )
+
+
+def unclaimed(ttl):
+    """Condition SQL : expérience sans réservation, ou réservation plus vieille que `ttl` secondes."""
+    # Même horloge que claimed_at (server_default now()) : l'expiration est calculée par PostgreSQL
+    return or_(
+        ModerationClaim.experience_id.is_(None),
+        ModerationClaim.claimed_at < func.now() - datetime.timedelta(seconds=ttl),
+    )
+
+
+def claim_experiences(moderator_id, limit, ttl):
+    """Réserve jusqu'à `limit` expériences en attente pour un modérateur et renvoie leurs IDs.
+
+    FOR UPDATE SKIP LOCKED : deux modérateurs qui réservent en même temps obtiennent
+    des lots disjoints ; une réservation plus vieille que `ttl` secondes est reprise.
+    """
+    rows = (
+        db.session.query(Experience.id_experience)
+        .outerjoin(ModerationClaim, ModerationClaim.experience_id == Experience.id_experience)
+        .filter(
+            Experience.is_validated == "pending",
+            or_(unclaimed(ttl), ModerationClaim.moderator_id == moderator_id),
+        )
+        .order_by(Experience.id_experience)
+        .limit(limit)
+        .with_for_update(of=Experience, skip_locked=True)
+        .all()
+    )
+    ids = [row.id_experience for row in rows]
+    if ids:
+        statement = insert(ModerationClaim).values(
+            [{"experience_id": experience_id, "moderator_id": moderator_id} for experience_id in ids]
+        )
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[ModerationClaim.experience_id],
+            set_={"moderator_id": statement.excluded.moderator_id, "claimed_at": func.now()},
+        ))
+    db.session.commit()
+    return ids
+
+
+def release_claims(experience_ids=None, moderator_id=None):
+    """Libère des réservations (par IDs et/ou par modérateur) ; ne valide pas la transaction."""
+    query = db.session.query(ModerationClaim)
+    if experience_ids is not None:
+        query = query.filter(_any_id(ModerationClaim.experience_id, experience_ids))
+    if moderator_id is not None:
+        query = query.filter(ModerationClaim.moderator_id == moderator_id)
+    return query.delete(synchronize_session=False)
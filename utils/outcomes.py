@@ -0,0 +1,42 @@
+from sqlalchemy import func, or_
+from models import db
+from models.experiences_model import Experience
+
+
+OUTCOMES = {"accepted", "rejected", "all"}
+
+
+def accepted_at(university_id):
+    # university_accepted_in @> ARRAY[id] : servi par l'index GIN
+    return Experience.university_accepted_in.contains([university_id])
+
+
+def rejected_at(university_id):
+    return Experience.university_rejected_in.contains([university_id])
+
+
+def outcome_filter(university_id, outcome="all"):
+    if outcome == "accepted":
+        return accepted_at(university_id)
+    if outcome == "rejected":
+        return rejected_at(university_id)
+    return or_(accepted_at(university_id), rejected_at(university_id))
+
+
+def university_outcome_counts(university_id):
+    """Acceptations/refus parmi les expériences approuvées, en une requête (BitmapOr sur les deux index GIN)."""
+    row = (
+        db.session.query(
+            func.count().filter(accepted_at(university_id)).label("accepted"),
+            func.count().filter(rejected_at(university_id)).label("rejected"),
+        )
+        .select_from(Experience)
+        .filter(Experience.is_validated == "approved", outcome_filter(university_id))
+        .one()
+    )
+    decided = row.accepted + row.rejected
+    return {
+        "accepted": row.accepted,
+        "rejected": row.rejected,
+        "acceptance_rate": row.accepted / decided if decided else None
+    }
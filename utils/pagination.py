@@ -0,0 +1,56 @@
+import base64
+import json
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Convertit le paramètre `limit` en entier borné ; lève ValueError si invalide."""
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (ValueError, TypeError):
+        raise ValueError("'limit' doit être un entier positif")
+    if limit <= 0:
+        raise ValueError("'limit' doit être un entier positif")
+    return min(limit, maximum)
+
+
+def encode_cursor(*values):
+    """Encode la clé de la dernière ligne d'une page en curseur opaque."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size, types=None):
+    """Décode un curseur produit par encode_cursor ; renvoie None si absent.
+
+    `types` (un convertisseur par valeur, ex. (int, int)) : un curseur forgé dont une
+    valeur ne se convertit pas lève ValueError comme un curseur illisible.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Curseur invalide")
+    if types is not None:
+        try:
+            values = [convert(value) for convert, value in zip(types, values)]
+        except (ValueError, TypeError):
+            raise ValueError("Curseur invalide")
+    return values
+
+
+def page_response(rows, limit, key):
+    """Découpe `limit + 1` lignes en (page, next_cursor) ; `key(row)` renvoie la clé de tri."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*key(rows[-1])) if has_more and rows else None
+    return rows, next_cursor
@@ -0,0 +1,80 @@
+import json
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+
+# Début d'exécution porté par le contexte d'exécution (un par requête SQL) plutôt que par
+# une pile sur la connexion : une requête en erreur (pas d'after_cursor_execute) ne laisse
+# aucune valeur orpheline qui fausserait les mesures suivantes.
+_START_ATTR = "_sql_profile_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and "sql_stats" in g:
+        setattr(context, _START_ATTR, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and "sql_stats" in g):
+        return
+    started = getattr(context, _START_ATTR, None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = g.sql_stats
+    stats["count"] += 1
+    stats["time"] += elapsed
+    # Même texte SQL, paramètres différents : motif N+1 typique
+    stats["statements"][statement] += 1
+
+
+def init_query_profiler(app):
+    """Compte les requêtes SQL et le temps DB par requête HTTP (activé par SQL_PROFILING).
+
+    Désactivé, aucun écouteur n'est enregistré : coût nul.
+    """
+    if not app.config.get("SQL_PROFILING"):
+        return
+    threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_sql_stats():
+        g.sql_stats = {"count": 0, "time": 0.0, "statements": Counter()}
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = g.pop("sql_stats", None)
+        if stats is None:
+            return response
+        db_ms = stats["time"] * 1000
+        repeated = [
+            {"count": count, "statement": " ".join(statement.split())[:300]}
+            for statement, count in stats["statements"].most_common()
+            if count >= threshold
+        ]
+        response.headers["X-DB-Queries"] = str(stats["count"])
+        response.headers.add("Server-Timing", f'db;dur={db_ms:.1f};desc="{stats["count"]} queries"')
+
+        line = json.dumps({
+            "event": "sql_profile",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "queries": stats["count"],
+            "db_ms": round(db_ms, 2),
+            "n_plus_one": repeated,
+        }, ensure_ascii=False)
+        if repeated:
+            app.logger.warning(line)
+        else:
+            app.logger.info(line)
+        return response
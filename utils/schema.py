@@ -0,0 +1,79 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from models import db
+
+
+# db.create_all() ne modifie jamais une table existante : colonnes et index ajoutés aux modèles
+# après coup, à appliquer aux bases déjà en service (flask upgrade-schema, idempotent).
+
+# (table, colonne, DDL)
+SCHEMA_COLUMNS = [
+    # Total des non-lus par destinataire (utils/unread_counters.py)
+    ("users", "unread_messages", "ALTER TABLE users ADD COLUMN IF NOT EXISTS unread_messages integer NOT NULL DEFAULT 0"),
+]
+
+# Index déclarés dans les modèles sur des tables préexistantes ; la définition est reprise des modèles
+SCHEMA_INDEXES = [
+    # Pagination par curseur de l'explorer et file de modération (models/experiences_model.py)
+    "ix_experiences_status_year_id",
+    "ix_experiences_status_speciality_year_id",
+    "ix_experiences_status_application_year",
+    "ix_experiences_pending_id",
+    # Requêtes @> sur les universités acceptées/refusées et filtre par université (outcomes, recompute)
+    "ix_experiences_accepted_in_gin",
+    "ix_experiences_rejected_in_gin",
+    "ix_experience_university_university_id",
+    # Historique paginé d'une conversation et messages non lus (models/message_model.py)
+    "ix_messagerie_sender_receiver_created",
+    "ix_messagerie_unread",
+]
+
+
+def _column_exists(table, column):
+    return db.session.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column
+        )
+    """), {"table": table, "column": column}).scalar()
+
+
+def _model_index(name):
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"Index {name} absent des modèles")
+
+
+def _create_index_concurrently(conn, index):
+    """Crée l'index sans bloquer les écritures ; renvoie False s'il existait déjà (valide)."""
+    valid = conn.execute(text("""
+        SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace
+    """), {"name": index.name}).scalar()
+    if valid:
+        return False
+    if valid is False:
+        # Un CREATE INDEX CONCURRENTLY interrompu laisse un index INVALID qu'IF NOT EXISTS ignorerait
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect)).strip()
+    conn.exec_driver_sql(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl))
+    return True
+
+
+def upgrade_schema():
+    """Ajoute les colonnes puis les index manquants ; renvoie (colonnes ajoutées, index créés)."""
+    added = [(table, column) for table, column, _ in SCHEMA_COLUMNS if not _column_exists(table, column)]
+    for _, _, statement in SCHEMA_COLUMNS:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+    created = []
+    # CONCURRENTLY est interdit dans une transaction : connexion dédiée en autocommit
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in SCHEMA_INDEXES:
+            if _create_index_concurrently(conn, _model_index(name)):
+                created.append(name)
+    return added, created
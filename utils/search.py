@@ -0,0 +1,115 @@
+import unicodedata
+from sqlalchemy import func, or_, text
+from models import db
+from utils.cache import TTLCache
+
+
+# Extensions, fonction unaccent IMMUTABLE (indexable) et index GIN trigrammes
+SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent', $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_universities_univ_name_trgm ON universities USING gin (f_unaccent(lower(univ_name)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_universities_city_trgm ON universities USING gin (f_unaccent(lower(city)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_specialities_name_trgm ON specialities USING gin (f_unaccent(lower(speciality_name)) gin_trgm_ops)",
+]
+
+AUTOCOMPLETE_LIMIT = 10
+autocomplete_cache = TTLCache(ttl=60, maxsize=5000)
+_unaccent_check = TTLCache(ttl=60)
+
+
+def install_search_ddl():
+    for statement in SEARCH_DDL:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def normalize(term):
+    """« Université de Montpellier » -> « universite de montpellier » (même normalisation que l'index)."""
+    decomposed = unicodedata.normalize("NFKD", term or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.lower().split())
+
+
+def searchable(column):
+    # Doit correspondre exactement à l'expression des index GIN
+    return func.f_unaccent(func.lower(column))
+
+
+def unaccent_available():
+    """Vrai si f_unaccent est installée (`flask init-search`) ; vérifié au plus une fois par minute."""
+    available = _unaccent_check.get("f_unaccent")
+    if available is None:
+        available = db.session.execute(text("SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL")).scalar()
+        _unaccent_check.set("f_unaccent", available)
+    return available
+
+
+def matches_name(column, term):
+    """Égalité insensible à la casse et aux accents, les deux côtés normalisés par PostgreSQL.
+
+    Sans f_unaccent (recherche pas encore installée), repli sur une égalité insensible à la casse.
+    """
+    term = " ".join((term or "").split())
+    if unaccent_available():
+        return searchable(column) == func.f_unaccent(func.lower(term))
+    return func.lower(column) == func.lower(term)
+
+
+def contains(column, term):
+    """Filtre « contient », insensible à la casse et aux accents (indexable via GIN trigrammes)."""
+    return searchable(column).like(f"%{_escape_like(normalize(term))}%", escape="\\")
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fuzzy_search(model, columns, term, limit=20, filters=()):
+    """Recherche floue classée par pertinence (word_similarity) ; utilise les index GIN trigrammes."""
+    term = normalize(term)
+    if not term:
+        return []
+    expressions = [searchable(column) for column in columns]
+    score = func.greatest(*[func.word_similarity(term, expr) for expr in expressions]) if len(expressions) > 1 \
+        else func.word_similarity(term, expressions[0])
+    return (
+        db.session.query(model, score.label("score"))
+        .filter(or_(*[expr.op("%>")(term) for expr in expressions],
+                    *[expr.like(f"%{_escape_like(term)}%", escape="\\") for expr in expressions]))
+        .filter(*filters)
+        .order_by(score.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def autocomplete(model, column, id_column, term, limit=AUTOCOMPLETE_LIMIT):
+    """Suggestions par préfixe de mot pour la saisie semi-automatique (résultats mis en cache 60 s)."""
+    term = normalize(term)
+    if not term:
+        return []
+    key = (model.__tablename__, term, limit)
+    cached = autocomplete_cache.get(key)
+    if cached is not None:
+        return cached
+
+    expr = searchable(column)
+    pattern = _escape_like(term)
+    starts_with = expr.like(f"{pattern}%", escape="\\")
+    rows = (
+        db.session.query(id_column, column)
+        .filter(or_(starts_with, expr.like(f"% {pattern}%", escape="\\")))
+        # Les noms qui commencent par le terme d'abord, puis par similarité
+        .order_by(starts_with.desc(), func.similarity(expr, term).desc(), func.length(column))
+        .limit(limit)
+        .all()
+    )
+    result = [{"id": row[0], "label": row[1]} for row in rows]
+    autocomplete_cache.set(key, result)
+    return result
@@ -0,0 +1,60 @@
+from sqlalchemy import Date, DateTime
+from models import db
+from models.university_model import University
+from models.speciality_model import Speciality
+from models.user_model import User
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class RowSerializer:
+    """Sérialise des Row (tuples de colonnes) en dicts, sans instancier d'objets ORM.
+
+    Les clés et les conversions sont calculées une fois à la construction ; seules
+    les colonnes date/heure sont converties (isoformat, comme les to_dict des modèles).
+    """
+
+    def __init__(self, *columns):
+        self.columns = columns
+        self.keys = tuple(column.key for column in columns)
+        self._dates = tuple(
+            i for i, column in enumerate(columns)
+            if isinstance(column.type, (Date, DateTime))
+        )
+
+    def query(self):
+        return db.session.query(*self.columns)
+
+    def dump(self, row):
+        if not self._dates:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for i in self._dates:
+            values[i] = _isoformat(values[i])
+        return dict(zip(self.keys, values))
+
+    def dump_all(self, rows):
+        return [self.dump(row) for row in rows]
+
+
+# Mêmes champs, dans le même ordre, que University.to_dict / Speciality.to_dict / User.to_dict
+UNIVERSITY_ROW = RowSerializer(
+    University.id_university, University.univ_name, University.city, University.specialities_nbr,
+    University.nbr_candidates_accepted, University.created_at,
+)
+
+SPECIALITY_ROW = RowSerializer(
+    Speciality.id_speciality, Speciality.speciality_name, Speciality.university_id,
+    Speciality.nbr_candidate_accepted_in, Speciality.min_bac_average, Speciality.min_tcf_score,
+    Speciality.min_average, Speciality.created_at,
+)
+
+# Sans mot de passe ni jeton
+USER_PUBLIC_ROW = RowSerializer(
+    User.id_user, User.first_name, User.last_name, User.email, User.accepted, User.experience, User.role,
+    User.nbr_experience, User.bac_average, User.bac_type, User.tcf_score, User.localisation, User.date_of_birth,
+    User.a_propos, User.univ_actuel, User.created_at, User.annee_etude_actuelle, User.speciality,
+    User.is_verified, User.subscription, User.isbanned,
+)
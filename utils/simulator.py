@@ -0,0 +1,260 @@
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from models import db
+from models.experiences_model import Experience
+
+
+# Années prises en compte dans average_each_year (mêmes clés que /experience/share)
+YEARS = ["1AS", "2AS", "3AS", "L1", "L2", "L3", "M1", "M2"]
+
+# Encodage ordinal du niveau d'étude au moment de la candidature
+STUDY_YEAR_RANK = {
+    "terminale": 0,
+    "L1": 1,
+    "L2": 2,
+    "L3": 3,
+    "M1": 4,
+    "M2": 5
+}
+
+# Recherche insensible à la casse : "Terminale", "l1"...
+_STUDY_YEAR_RANK_CI = {key.lower(): rank for key, rank in STUDY_YEAR_RANK.items()}
+
+NUMERIC_FEATURES = ["bac_average", "level_tcf", "study_year"] + YEARS
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def _study_year_rank(value):
+    if value in (None, ""):
+        return np.nan
+    rank = _STUDY_YEAR_RANK_CI.get(str(value).strip().lower())
+    return np.nan if rank is None else float(rank)
+
+
+def _numeric_vector(bac_average, level_tcf, study_year, averages):
+    averages = averages or {}
+    return [
+        _to_float(bac_average),
+        _to_float(level_tcf),
+        _study_year_rank(study_year),
+    ] + [_to_float(averages.get(year)) for year in YEARS]
+
+
+def experience_record(exp):
+    """Extrait d'une expérience les données utiles au simulateur (aucun accès ORM ensuite)."""
+    return {
+        "id_experience": exp.id_experience,
+        "speciality_id": exp.speciality_id,
+        "bac_type": exp.bac_type,
+        "numeric": _numeric_vector(exp.bac_average, exp.level_tcf, exp.study_year_at_application_time, exp.average_each_year),
+        "accepted": [int(u) for u in (exp.university_accepted_in or []) if str(u).strip().isdigit()],
+        "rejected": [int(u) for u in (exp.university_rejected_in or []) if str(u).strip().isdigit()],
+    }
+
+
+def profile_vector(user, grades, overrides=None):
+    """Construit le profil de requête à partir du User, de ses Grade et d'éventuelles surcharges."""
+    overrides = overrides or {}
+    # bac_average/tcf_score valent 0 par défaut sur User : 0 signifie « non renseigné »
+    bac_average = overrides.get("bac_average", user.bac_average or None)
+    tcf_score = overrides.get("tcf_score", user.tcf_score or None)
+    averages = {grade.level: grade.average for grade in grades}
+    averages.update({year: overrides[year] for year in YEARS if year in overrides})
+    return {
+        "bac_type": overrides.get("bac_type", user.bac_type),
+        "numeric": _numeric_vector(
+            bac_average,
+            tcf_score,
+            overrides.get("annee_etude_actuelle", user.annee_etude_actuelle),
+            averages,
+        ),
+    }
+
+
+class SimulatorIndex:
+    """Matrice de caractéristiques NumPy des expériences approuvées.
+
+    Les mises à jour (approbation, rejet, suppression) modifient uniquement les
+    enregistrements en mémoire ; la matrice est reconstruite à la requête suivante.
+    L'index est propre à chaque processus : ensure_fresh() compare au plus toutes les
+    `check_interval` secondes une empreinte de la base (count/sum des IDs approuvés)
+    et recharge si une modération faite dans un autre worker l'a modifiée.
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._records = {}
+        self._loaded = False
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._dirty = True
+        self._matrix = None
+        self._scale = None
+        self._ids = None
+        self._records_list = []
+        self._bac_types = []
+
+    @staticmethod
+    def _approved_query():
+        return (
+            db.session.query(
+                Experience.id_experience, Experience.speciality_id, Experience.bac_type,
+                Experience.bac_average, Experience.level_tcf, Experience.study_year_at_application_time,
+                Experience.average_each_year, Experience.university_accepted_in, Experience.university_rejected_in,
+            )
+            .filter(Experience.is_validated == "approved")
+        )
+
+    @staticmethod
+    def _current_fingerprint():
+        # Change à chaque approbation, rejet ou suppression d'une expérience approuvée
+        row = (
+            db.session.query(func.count(Experience.id_experience), func.coalesce(func.sum(Experience.id_experience), 0))
+            .filter(Experience.is_validated == "approved")
+            .one()
+        )
+        return tuple(row)
+
+    def load(self):
+        """Charge toutes les expériences approuvées depuis la base (une seule requête)."""
+        # Empreinte lue avant les lignes : une modération intercalée déclenchera un rechargement
+        fingerprint = self._current_fingerprint()
+        rows = self._approved_query().all()
+        with self._lock:
+            self._records = {row.id_experience: experience_record(row) for row in rows}
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            self._loaded = True
+            self._dirty = True
+
+    def ensure_fresh(self):
+        """Charge l'index, ou le recharge si la base a changé depuis le dernier contrôle."""
+        if not self._loaded:
+            self.load()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if self._current_fingerprint() != self._fingerprint:
+            self.load()
+
+    def upsert(self, exp):
+        with self._lock:
+            if not self._loaded:
+                return
+            if exp.is_validated == "approved":
+                self._records[exp.id_experience] = experience_record(exp)
+            else:
+                self._records.pop(exp.id_experience, None)
+            self._dirty = True
+
+    def refresh(self, experience_ids):
+        """Resynchronise un lot d'expériences depuis la base (une requête), après une modération groupée."""
+        if not self._loaded or not experience_ids:
+            return
+        rows = self._approved_query().filter(Experience.id_experience.in_(experience_ids)).all()
+        with self._lock:
+            for experience_id in experience_ids:
+                self._records.pop(experience_id, None)
+            for row in rows:
+                self._records[row.id_experience] = experience_record(row)
+            self._dirty = True
+
+    def discard(self, experience_id):
+        with self._lock:
+            if self._records.pop(experience_id, None) is not None:
+                self._dirty = True
+
+    def _rebuild(self):
+        records = list(self._records.values())
+        self._ids = np.array([r["id_experience"] for r in records], dtype=np.int64)
+        self._bac_types = sorted({r["bac_type"] for r in records if r["bac_type"]})
+        numeric = np.array([r["numeric"] for r in records], dtype=np.float64).reshape(len(records), len(NUMERIC_FEATURES))
+
+        # Valeurs manquantes remplacées par la moyenne de la colonne, puis standardisation
+        with np.errstate(invalid="ignore"):
+            means = np.nanmean(numeric, axis=0) if len(records) else np.zeros(len(NUMERIC_FEATURES))
+            stds = np.nanstd(numeric, axis=0) if len(records) else np.ones(len(NUMERIC_FEATURES))
+        means = np.nan_to_num(means)
+        stds = np.where(np.isnan(stds) | (stds == 0), 1.0, stds)
+        numeric = np.where(np.isnan(numeric), means, numeric)
+
+        one_hot = np.zeros((len(records), len(self._bac_types)))
+        positions = {bac_type: i for i, bac_type in enumerate(self._bac_types)}
+        for row, record in enumerate(records):
+            if record["bac_type"] in positions:
+                one_hot[row, positions[record["bac_type"]]] = 1.0
+
+        self._scale = np.concatenate([stds, np.ones(len(self._bac_types))])
+        self._matrix = np.hstack([numeric, one_hot]) / self._scale
+        self._records_list = records
+        self._dirty = False
+
+    def _query_vector(self, profile):
+        numeric = np.array(profile["numeric"], dtype=np.float64)
+        one_hot = np.array([1.0 if profile.get("bac_type") == b else 0.0 for b in self._bac_types])
+        vector = np.concatenate([numeric, one_hot]) / self._scale
+        # Une caractéristique absente du profil n'entre pas dans la distance
+        weights = np.concatenate([~np.isnan(numeric), np.full(len(self._bac_types), bool(profile.get("bac_type")))])
+        return np.nan_to_num(vector), weights.astype(np.float64)
+
+    def nearest(self, profile, k=20):
+        """Renvoie les k expériences les plus proches : [(record, distance)]."""
+        with self._lock:
+            if not self._loaded:
+                raise RuntimeError("Index du simulateur non chargé")
+            if self._dirty:
+                self._rebuild()
+            if not len(self._ids):
+                return []
+            vector, weights = self._query_vector(profile)
+            distances = np.sqrt((((self._matrix - vector) ** 2) * weights).sum(axis=1))
+            k = min(k, len(distances))
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top])]
+            return [(self._records_list[i], float(distances[i])) for i in top]
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+
+def acceptance_rates(neighbours):
+    """Taux d'acceptation par université et par spécialité parmi les voisins."""
+    universities = {}
+    specialities = {}
+    for record, _ in neighbours:
+        for univ_id in record["accepted"]:
+            universities.setdefault(univ_id, [0, 0])[0] += 1
+        for univ_id in record["rejected"]:
+            universities.setdefault(univ_id, [0, 0])[1] += 1
+        stats = specialities.setdefault(record["speciality_id"], [0, 0])
+        if record["accepted"]:
+            stats[0] += 1
+        else:
+            stats[1] += 1
+
+    def _rates(counts, key):
+        return sorted(
+            [
+                {key: item_id, "accepted": a, "rejected": r, "acceptance_rate": a / (a + r)}
+                for item_id, (a, r) in counts.items()
+            ],
+            key=lambda x: (x["acceptance_rate"], x["accepted"]),
+            reverse=True,
+        )
+
+    return _rates(universities, "university_id"), _rates(specialities, "speciality_id")
+
+
+simulator_index = SimulatorIndex()
@@ -0,0 +1,72 @@
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from models import db
+from models.message_model import Message
+from models.unread_counter_model import UnreadCounter
+from models.user_model import User
+
+
+def increment_unread(receiver_id, sender_id, count=1):
+    """Nouveau message : compteurs de conversation et total du destinataire, dans la transaction courante."""
+    stmt = insert(UnreadCounter.__table__).values(user_id=receiver_id, peer_id=sender_id, unread=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "peer_id"],
+        set_={"unread": UnreadCounter.__table__.c.unread + count},
+    )
+    db.session.execute(stmt)
+    db.session.execute(
+        User.__table__.update()
+        .where(User.id_user == receiver_id)
+        .values(unread_messages=func.coalesce(User.unread_messages, 0) + count)
+    )
+
+
+def decrement_unread(receiver_id, read_by_sender):
+    """Messages lus : {sender_id: nombre} -> décrément des compteurs (jamais en dessous de 0)."""
+    if not read_by_sender:
+        return
+    table = UnreadCounter.__table__
+    for sender_id, count in read_by_sender.items():
+        db.session.execute(
+            table.update()
+            .where(table.c.user_id == receiver_id, table.c.peer_id == sender_id)
+            .values(unread=func.greatest(table.c.unread - count, 0))
+        )
+    total = sum(read_by_sender.values())
+    db.session.execute(
+        User.__table__.update()
+        .where(User.id_user == receiver_id)
+        .values(unread_messages=func.greatest(func.coalesce(User.unread_messages, 0) - total, 0))
+    )
+
+
+def get_unread(user_id):
+    total = db.session.query(User.unread_messages).filter(User.id_user == user_id).scalar() or 0
+    conversations = (
+        db.session.query(UnreadCounter.peer_id, UnreadCounter.unread)
+        .filter(UnreadCounter.user_id == user_id, UnreadCounter.unread > 0)
+        .all()
+    )
+    return {"total": total, "conversations": {peer_id: unread for peer_id, unread in conversations}}
+
+
+def repair_unread_counters():
+    """Recalcule tous les compteurs depuis messagerie (index partiel sur les non-lus) ; renvoie le nombre de conversations."""
+    db.session.execute(text("LOCK TABLE unread_counters IN EXCLUSIVE MODE"))
+    db.session.execute(UnreadCounter.__table__.delete())
+    unread = (
+        db.session.query(Message.receiver_id, Message.sender_id, func.count(Message.id_message))
+        .filter(Message.is_read == False)
+        .group_by(Message.receiver_id, Message.sender_id)
+    )
+    inserted = db.session.execute(
+        insert(UnreadCounter.__table__).from_select(["user_id", "peer_id", "unread"], unread)
+    ).rowcount
+    totals = (
+        db.session.query(func.count(Message.id_message))
+        .filter(Message.receiver_id == User.id_user, Message.is_read == False)
+        .scalar_subquery()
+    )
+    db.session.execute(User.__table__.update().values(unread_messages=totals))
+    db.session.commit()
+    return inserted